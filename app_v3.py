@@ -6,37 +6,92 @@ import pandas as pd #For loading and manipulating the NYC Restaurants data
 import seaborn as sns
 import matplotlib.pyplot as plt
 import plotly.express as px
+import data_store #Local snapshot store for the cleaned dataset
+import shared_dataset #Zero-copy dataset published by a loader process for every app process on the host
+from dataset import Dataset #Read-only dataset handle with indexes and option lists
+from name_index import TYPEAHEAD_PAGE_SIZE
+from query_backend import create_backend #Pandas or DuckDB engine behind the filters, top-k lists and counts
+from cube import rollup #Roll-ups of the aggregate cube for the charts
+from history import ROLLING_WINDOW
+import export #Chunked CSV / gzip-CSV / Parquet exports of full result sets
 
-@st.cache_data #Caches the data to improve performance. This prevents re-downloading the data on every page reload.
-def load_data():
-    url = "https://data.cityofnewyork.us/api/views/43nn-pn8j/rows.csv?accessType=DOWNLOAD" #Loads the inspection dataset directly from NYC Open Data.
-    df = pd.read_csv(url)
-    df = df[['DBA', 'BORO', 'CUISINE DESCRIPTION', 'INSPECTION DATE',
-             'VIOLATION DESCRIPTION', 'CRITICAL FLAG', 'GRADE', 'SCORE', 'ZIPCODE']] #selecting only relevant columns needed for analysis and display.
-    df.dropna(subset=['DBA', 'GRADE'], inplace=True) #Removes rows where the restaurant name or grade is missing.
-    df['INSPECTION DATE'] = pd.to_datetime(df['INSPECTION DATE'], errors='coerce') #Converts the inspection date to datetime format and drops rows where it's invalid.
-    df.dropna(subset=['INSPECTION DATE'], inplace=True)
-    df['DBA'] = df['DBA'].str.title() #Capitalizes the restaurant names consistently.
-    return df #Returns the cleaned dataframe.
+@st.cache_resource(max_entries=2) #Loaded once and shared by every session; st.cache_data would hand each rerun its own copy. Older versions are evicted.
+def load_data(version): #The dataset version is part of the cache key, so a refresh (refresh.py) invalidates the cache automatically.
+    if shared_dataset.SHARED_DIR: #Attach to the published copy instead of loading a private one (see shared_dataset.py).
+        return shared_dataset.attach(version)
+    return data_store.load_dataset() #Fast columnar read of the local snapshot (a private copy per process); only downloads from NYC Open Data when no snapshot exists yet (see data_store.py).
+
+@st.cache_resource(max_entries=2) #One handle per dataset version: the name/facet indexes and the widget option lists are built once, not on every rerun.
+def get_dataset(version):
+    if shared_dataset.SHARED_DIR: #The index arrays are mapped from the published copy too, instead of being built in every process.
+        return Dataset(load_data(version), version, shared_dataset.attach_indexes(version))
+    return Dataset(load_data(version), version)
+
+@st.cache_resource(max_entries=2) #Query backend for this dataset version, chosen with NYC_INSPECTOR_BACKEND (see query_backend.py).
+def get_backend(version):
+    return create_backend(get_dataset(version))
+
+def current_version(): #Version to serve on this rerun: the shared CURRENT pointer in shared mode, else the local snapshot's.
+    if shared_dataset.SHARED_DIR:
+        return shared_dataset.current_version()
+    if not data_store.has_snapshot(): #Cold start or outdated schema: build first, so nothing gets cached under a version that is about to change.
+        data_store.load_dataset()
+    return data_store.dataset_version()
+
+NEARBY_LIMIT = 200 #Most restaurants listed and mapped by the "near a location" search.
+KEYWORD_PERIODS = {"All time": None, "3 months": 3, "6 months": 6, "12 months": 12, "24 months": 24} #Months before the latest inspection in the data.
+
+#Chart Functions: each figure is built from the aggregate cube once per dataset version and reused on every rerun.
+@st.cache_resource(max_entries=2)
+def cuisine_chart(version):
+    top_cuisines = get_backend(version).counts('CUISINE DESCRIPTION', limit=15)
+    top_cuisines.columns = ['Cuisine Type', 'Number of Inspections']
+
+    fig1 = px.bar(
+        top_cuisines,
+        x='Cuisine Type',
+        y='Number of Inspections',
+        color='Number of Inspections',
+        color_continuous_scale='Viridis',
+        title="Top 15 Cuisine Types",
+    )
+    fig1.update_layout(xaxis_tickangle=-45)
+    return fig1
+
+@st.cache_resource(max_entries=2)
+def borough_chart(version):
+    borough_violations = get_backend(version).counts('BORO')
+    borough_violations.columns = ['Borough', 'Number of Violations']
+
+    fig2 = px.pie(
+        borough_violations,
+        names='Borough',
+        values='Number of Violations',
+        title="Violations Distribution by Borough",
+        hole=0.4  # for donut-style chart
+    )
+    return fig2
+
+@st.cache_resource(max_entries=2)
+def monthly_chart(version):
+    monthly = rollup(get_dataset(version).cube, ['MONTH']).rename(columns={'MONTH': 'Month'})
+
+    fig3 = px.line(
+        monthly,
+        x='Month',
+        y='mean_score',
+        hover_data={'rows': True},
+        labels={'mean_score': 'Average Score', 'rows': 'Number of Violations'},
+        title="Average Inspection Score by Month",
+    )
+    return fig3
 
 #Helper Functions:
-def search_restaurants(df, name=None, zip_code=None): #Filters data based on optional name and zip code inputs.
-    if name:
-        df = df[df['DBA'].str.contains(name, case=False, na=False)] #Filters rows where restaurant name contains the input text
-    if zip_code:
-        df = df[df['ZIPCODE'] == int(zip_code)] #Filters by exact zip code.
-    return df.sort_values(by='INSPECTION DATE', ascending=False).head(20) #Sorts by latest inspection date and returns the top 20 recent records.
-
-def menu_driven_selection(df, cuisine=None, grade=None, critical=None): #Allows filtering by cuisine, grade and critical flag as per user selection.
-    if cuisine:
-        df = df[df['CUISINE DESCRIPTION'] == cuisine]
-    if grade:
-        df = df[df['GRADE'] == grade]
-    if critical == "Critical":
-        df = df[df['CRITICAL FLAG'] == "Critical"]
-    elif critical == "Not Critical":
-        df = df[df['CRITICAL FLAG'] == "Not Critical"]
-    return df.sort_values(by='SCORE').head(20) #Shows top 20 restaurants with lowest score (best food safety compliance)
+def search_restaurants(backend, name=None, zip_code=None, limit=20): #Filters data based on optional name and zip code inputs.
+    return backend.search(name, int(zip_code) if zip_code else None, limit=limit) #Name contains the input text, exact zip code; returns the top 20 most recent records (limit=None: all of them).
+
+def menu_driven_selection(backend, cuisine=None, grade=None, critical=None, limit=20): #Allows filtering by cuisine, grade and critical flag as per user selection.
+    return backend.top_by_score(cuisine, grade, critical, limit=limit) #Shows top 20 restaurants with lowest score (best food safety compliance)
 
 def rename_columns_for_display(df): #Renaming all columns for display, improving the readability of column headers for the end user.
     return df.rename(columns={
@@ -46,12 +101,37 @@ def rename_columns_for_display(df): #Renaming all columns for display, improving
         'GRADE': 'Grade',
         'SCORE': 'Score',
         'VIOLATION DESCRIPTION': 'Violation Details',
-        'CRITICAL FLAG': 'Critical Issue'
+        'CRITICAL FLAG': 'Critical Issue',
+        'ADDRESS': 'Address',
+        'critical_violations': 'Critical Violations',
+        'DISTANCE': 'Distance (m)',
+        'CUISINE DESCRIPTION': 'Cuisine',
+        'PREVIOUS DATE': 'Previous Inspection',
+        'PREVIOUS SCORE': 'Previous Score',
+        'PREVIOUS GRADE': 'Previous Grade',
+        'SCORE CHANGE': 'Score Change',
+        'ROLLING SCORE': f'Average of Last {ROLLING_WINDOW} Scores'
     })
 
+def nearby_restaurants(dataset, latitude, longitude, metres): #Restaurants within the radius, by their latest inspection, nearest first.
+    restaurant_ids, distances = dataset.spatial_index.within(latitude, longitude, metres, limit=NEARBY_LIMIT) #Grid lookup, no distance computed over the whole table.
+    nearby = dataset.model.latest.iloc[restaurant_ids].copy()
+    nearby['DISTANCE'] = distances.round().astype(int)
+    nearby[['Latitude', 'Longitude']] = nearby[['Latitude', 'Longitude']].astype('float64') #st.map only serializes float64.
+    return nearby
+
+def download_all_button(label, query, file_stem, export_format): #Download of the full result set; query() and the file only run when the button is clicked.
+    st.download_button(
+        label,
+        data=lambda: export.export_bytes(query(), export_format, rename_columns_for_display), #Deferred: called on click, not on every rerun.
+        file_name=export.file_name(file_stem, export_format),
+        mime=export.FORMATS[export_format][1],
+        on_click="ignore", #Keeps the results on screen while the file downloads.
+    )
+
 def main():
     st.set_page_config(page_title="NYC Restaurant Inspector", layout="wide") #Sets the title and full-width layout.
-    df = load_data() #Loads the cached data
+    dataset = get_dataset(current_version()) #Shared handle for the current snapshot version, nothing is copied per rerun.
 
     #Sidebar explanation: Permanent definitions that is common to all tabs.
     with st.sidebar: 
@@ -74,11 +154,12 @@ def main():
         """)
 
     #Tab Layout:
-    tab1, tab2, tab3, tab4 = st.tabs([
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
         "\U0001F4D8 Project Overview", 
         "\U0001F50D Search Restaurants", 
         "\U0001F37D️ Explore by Cuisine & Grade",
-        "📊 Visual Insights"
+        "📊 Visual Insights",
+        "📈 Trends"
     ])
 
     #Tab 1: Project Overview: Describes problem statement, Data Source Details and what this app does.
@@ -93,46 +174,106 @@ def main():
 
         ### \U0001F3AF App Features  
         - Search by restaurant name and ZIP code  
+        - Find restaurants near a location on a map  
         - Explore by cuisine type and inspection grade  
         - See latest inspection scores, grades, and violations  
+        - Search violations by keyword, e.g. "mice OR roaches"  
+        - Track how scores and grades change over time  
         """)
 
     #Tab 2: Search Resturants, allowing searching by name or ZIP using user-friendly widgets.
     with tab2:
         st.title("\U0001F50D Search by Restaurant Name & ZIP Code")
-        restaurant_list = sorted(df['DBA'].dropna().unique()) #Gets all unique restaurant names, removes NaN and sorts them alphabetically.
-        name = st.selectbox("Select Restaurant Name", options=[""] + restaurant_list) #To let user pick a restaurant name, adds a blank default option to nothing is pre-selected.
+        typed_name = st.text_input("Type a Restaurant Name") #Matching names are looked up on the server, only one page of them is sent to the browser.
+        suggestions, total_matches = dataset.name_index.typeahead(typed_name) #First page of ranked matches and the total count.
+        if total_matches > len(suggestions): #More matches than fit on one page, let the user page through them.
+            pages = -(-total_matches // TYPEAHEAD_PAGE_SIZE)
+            page = st.number_input(f"{total_matches} matches, page", min_value=1, max_value=pages, value=1)
+            suggestions, _ = dataset.name_index.typeahead(typed_name, page=page - 1)
+        picked_name = st.selectbox("Select Restaurant Name", options=[""] + suggestions) #To let user pick a restaurant name, adds a blank default option to nothing is pre-selected.
+        name = picked_name or typed_name.strip() #Without a pick, the typed text is searched as a substring (with typo tolerance).
         zip_code = st.text_input("Enter ZIP Code (optional)") #Text input where user can optionally enter a ZIP code to narrow down results.
+        search_format = st.selectbox("Download format", options=list(export.FORMATS), key="search_format") #Format of the full-results download.
 
         #Logic to trigger Search:
         if st.button("Search"): #When search button is clicked.
-            results = search_restaurants(df.copy(), name, zip_code) #Calls the search_restaurants() function, passing a copy of dataframe along with name and ZIP code input, returning top results.
+            backend = get_backend(dataset.version)
+            results = search_restaurants(backend, name, zip_code) #Calls the search_restaurants() function with the query backend along with name and ZIP code input, returning top results.
             if not results.empty: #To check if search returned any results.
                 st.success(f"Top {len(results)} results for '{name}'") #Displays a subheading showing the restaurant name (formatted with title() to make it pretty).
                 display_df = rename_columns_for_display(results) #Renames columns to user-friendly headers using the helper function.
                 st.dataframe(display_df[['Restaurant Name', 'Borough', 'Inspection Date', 'Grade', 'Score', 'Critical Issue', 'Violation Details']]) #Displays the search result table.
-                csv = display_df.to_csv(index=False).encode('utf-8') #Converts the table to CSV and offers it as a downloadable file.
-                st.download_button("Download Results as CSV", csv, "filtered_results.csv", "text/csv")
+                download_all_button("Download All Matching Records", lambda: search_restaurants(backend, name, zip_code, limit=None), "filtered_results", search_format)
+                if zip_code: #ZIP codes whose restaurants share or touch a 250 m grid cell with this one's.
+                    neighbours = dataset.spatial_index.neighbouring_zips(zip_code)
+                    if neighbours:
+                        st.caption("Neighbouring ZIP codes: " + ", ".join(str(neighbour) for neighbour in neighbours))
             else: #If no match is found, show a warning message.
                 st.warning("No matching records found.")
 
+        #Near a location: radius search over the spatial index, centred on a ZIP code (picked borough -> ZIP) or on coordinates.
+        st.subheader("📍 Restaurants Near a Location")
+        centre_on = st.radio("Centre on", options=["ZIP Code", "Coordinates"], horizontal=True)
+        if centre_on == "ZIP Code":
+            boroughs = sorted(dataset.spatial_index.borough_zips)
+            borough = st.selectbox("Borough", options=boroughs)
+            centre_zip = st.selectbox("ZIP Code", options=dataset.spatial_index.borough_zips.get(borough, []))
+            centre = dataset.spatial_index.zip_centre(centre_zip) if centre_zip else None
+        else:
+            centre = (st.number_input("Latitude", value=40.7580, format="%.4f"), st.number_input("Longitude", value=-73.9855, format="%.4f")) #Defaults to Times Square.
+        metres = st.slider("Radius (metres)", min_value=100, max_value=3000, value=500, step=100)
+        if st.button("Find Nearby"):
+            nearby = nearby_restaurants(dataset, centre[0], centre[1], metres) if centre else None
+            if nearby is not None and not nearby.empty:
+                st.success(f"{len(nearby)} restaurants within {metres} m")
+                display_df = rename_columns_for_display(nearby)
+                st.dataframe(display_df[['Restaurant Name', 'Address', 'Distance (m)', 'Inspection Date', 'Grade', 'Score', 'Critical Violations']])
+                st.map(nearby, latitude='Latitude', longitude='Longitude', size=20)
+            else:
+                st.warning("No restaurants with a known location in this area.")
+
     with tab3:
         st.title("\U0001F37D️ Filter by Cuisine, Grade & Critical Flag") #Displays the title at the top of Tab 3.
 
-        cuisine = st.selectbox("Select Cuisine Type", options=sorted(df['CUISINE DESCRIPTION'].dropna().unique())) #Dropdown for selecting a cuisine type from all unique available cuisines.
-        unique_grades = sorted(df['GRADE'].dropna().unique())
+        cuisine = st.selectbox("Select Cuisine Type", options=dataset.cuisines) #Dropdown for selecting a cuisine type from all unique available cuisines.
+        unique_grades = dataset.grades
         default_grade = 'A' if 'A' in unique_grades else unique_grades[0]
         grade = st.radio("Select Inspection Grade", options=unique_grades, index=unique_grades.index(default_grade)) #radio buttons to select a grade (A, B, C, etc.). The first one (index=0) is selected by default.
 
         critical_choice = st.radio("Select Critical Flag", options=["All", "Critical", "Not Critical"], index=0) #Another radio group to choose between: All restaurants, Only those with critical violations, Only those without critical violations
 
-        filtered = menu_driven_selection(df.copy(), cuisine, grade, critical_choice) #Calls the filtering function with selected inputs & Returns a filtered DataFrame of restaurants based on chosen filters.
+        latest_only = st.checkbox("Show each restaurant once (current grade from its latest inspection)") #Without it every violation row is listed, so a restaurant can repeat.
+
+        with st.expander("🔎 Filter by Violation Keywords"): #Boolean keyword search over the violation descriptions (see violation_index.py).
+            keywords = st.text_input("Violation Keywords", placeholder="e.g. mice OR roaches, food NOT cold") #Words match by prefix: 'roach' also finds 'roaches'.
+            borough = st.selectbox("Borough", options=["All"] + dataset.boroughs)
+            period = st.selectbox("Inspected Within the Last", options=list(KEYWORD_PERIODS))
+            any_cuisine = st.checkbox("Search every cuisine and grade") #Otherwise the cuisine and grade picked above also apply.
+        explore_format = st.selectbox("Download format", options=list(export.FORMATS), key="explore_format")
+
+        if keywords.strip(): #Violation rows matching the keywords and every filter, most recent first; one bitmap AND per filter.
+            violations = dataset.violation_index
+            months = KEYWORD_PERIODS[period]
+            start = pd.Timestamp(violations.latest_date) - pd.DateOffset(months=months) if months and violations.latest_date is not None else None
+            bitmap = violations.search(keywords, borough, None if any_cuisine else cuisine, None if any_cuisine else grade, critical_choice, start=start)
+            query = lambda limit: dataset.df.iloc[violations.rows_of(bitmap, limit)]
+            columns = ['Restaurant Name', 'Borough', 'Inspection Date', 'Grade', 'Score', 'Critical Issue', 'Violation Details']
+        elif latest_only:
+            query = lambda limit: dataset.model.current(grade, cuisine, critical_choice, k=limit) #Direct lookup in the restaurant table, one row per restaurant.
+            columns = ['Restaurant Name', 'Borough', 'Address', 'Inspection Date', 'Grade', 'Score', 'Critical Violations']
+        else:
+            backend = get_backend(dataset.version)
+            query = lambda limit: menu_driven_selection(backend, cuisine, grade, critical_choice, limit) #Calls the filtering function with selected inputs & Returns a filtered DataFrame of restaurants based on chosen filters.
+            columns = ['Restaurant Name', 'Borough', 'Inspection Date', 'Grade', 'Score', 'Critical Issue', 'Violation Details']
+        filtered = query(20)
         if not filtered.empty: #Checks if the filter returns any restaurants.
-            st.success(f"Top {len(filtered)} restaurants with grade '{grade}' for '{cuisine}' cuisine")
+            if keywords.strip():
+                st.success(f"{len(filtered)} most recent of {violations.count(bitmap)} violations matching '{keywords.strip()}'")
+            else:
+                st.success(f"Top {len(filtered)} restaurants with grade '{grade}' for '{cuisine}' cuisine")
             display_df = rename_columns_for_display(filtered) #Renames columns for better display.
-            st.dataframe(display_df[['Restaurant Name', 'Borough', 'Inspection Date', 'Grade', 'Score', 'Critical Issue', 'Violation Details']]) #Shows a clean table with the relevant columns.
-            csv = display_df.to_csv(index=False).encode('utf-8')
-            st.download_button("Download Filtered Cuisine Results", csv, "cuisine_filtered.csv", "text/csv") #Adds a download button for the filtered data.
+            st.dataframe(display_df[columns]) #Shows a clean table with the relevant columns.
+            download_all_button("Download All Filtered Cuisine Results", lambda: query(None), "cuisine_filtered", explore_format) #Every matching row, not only the top 20 shown.
         else:
             st.warning("No records found for selected filters.") #Displays a warning if no data matches the filters.
 
@@ -170,32 +311,38 @@ def main():
         st.title("📊 Visual Insights")
 
         st.markdown("### 🍽️ Top 15 Cuisine Types by Inspection Count")
-        top_cuisines = df['CUISINE DESCRIPTION'].value_counts().nlargest(15).reset_index()
-        top_cuisines.columns = ['Cuisine Type', 'Number of Inspections']
-
-        fig1 = px.bar(
-            top_cuisines,
-            x='Cuisine Type',
-            y='Number of Inspections',
-            color='Number of Inspections',
-            color_continuous_scale='Viridis',
-            title="Top 15 Cuisine Types",
-        )
-        fig1.update_layout(xaxis_tickangle=-45)
-        st.plotly_chart(fig1, use_container_width=True)
+        st.plotly_chart(cuisine_chart(dataset.version), use_container_width=True) #Cached figure, no pass over the full table.
 
         st.markdown("### 🗺️ Violations by Borough")
-        borough_violations = df['BORO'].value_counts().reset_index()
-        borough_violations.columns = ['Borough', 'Number of Violations']
-
-        fig2 = px.pie(
-            borough_violations,
-            names='Borough',
-            values='Number of Violations',
-            title="Violations Distribution by Borough",
-            hole=0.4  # for donut-style chart
-        )
-        st.plotly_chart(fig2, use_container_width=True)
+        st.plotly_chart(borough_chart(dataset.version), use_container_width=True)
+
+        st.markdown("### 📈 Average Score Over Time")
+        st.plotly_chart(monthly_chart(dataset.version), use_container_width=True)
+
+    #Tab 5: Trends, how restaurants' scores and grades moved between inspections (see history.py).
+    with tab5:
+        st.title("📈 Score & Grade Trends")
+        history = dataset.history
+        quarter = st.selectbox("Select Quarter", options=history.quarters, format_func=str) #Quarters that have inspections, newest first.
+
+        st.markdown("### 📉 Restaurants That Got Worse")
+        worse = history.worsening(quarter, k=20) #Latest score in the quarter versus the last one before it, for every restaurant at once.
+        if not worse.empty:
+            st.success(f"Top {len(worse)} score increases in {quarter} (higher score = more violation points)")
+            display_df = rename_columns_for_display(worse)
+            st.dataframe(display_df[['Restaurant Name', 'Borough', 'Cuisine', 'Previous Inspection', 'Previous Score', 'Previous Grade',
+                                     'Inspection Date', 'Score', 'Grade', 'Score Change']])
+
+            picked = st.selectbox("Show Inspection History", options=range(len(worse)), format_func=lambda i: worse['DBA'].iloc[i])
+            trend = history.history_of(worse['restaurant_id'].iloc[picked]).astype({'SCORE': 'float64'})
+            fig = px.line(trend, x='INSPECTION DATE', y=['SCORE', 'ROLLING SCORE'], markers=True, title=f"Scores of {worse['DBA'].iloc[picked]}")
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.warning("No restaurant was re-inspected with a higher score in this quarter.")
+
+        st.markdown("### 🔁 Grade Transitions")
+        st.caption(f"Grade at the previous inspection (rows) versus the grade at an inspection in {quarter} (columns).")
+        st.dataframe(history.transitions(quarter))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,81 @@
+#Rerun benchmark: the data work main() does on every Streamlit rerun, before and after the read-only Dataset handle.
+#"legacy" repeats what app_v3.py used to do on each widget interaction: two full df.copy() calls, three sorted-unique
+#option lists and the mask/sort queries, on the original object-dtype frame. "current" is the path main() takes now.
+#Usage (uses the local snapshot, see data_store.py): python bench_rerun.py --repeat 20
+
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+
+import compact
+import data_store
+from app_v3 import menu_driven_selection, search_restaurants
+from dataset import Dataset
+from query_backend import create_backend
+
+def legacy_rerun(df, name, cuisine, grade): #Data work of one rerun of the original main().
+    restaurant_list = sorted(df['DBA'].dropna().unique())
+    results = df.copy()
+    results = results[results['DBA'].str.contains(name, case=False, na=False)]
+    results = results.sort_values(by='INSPECTION DATE', ascending=False).head(20)
+    cuisines = sorted(df['CUISINE DESCRIPTION'].dropna().unique())
+    unique_grades = sorted(df['GRADE'].dropna().unique())
+    filtered = df.copy()
+    filtered = filtered[(filtered['CUISINE DESCRIPTION'] == cuisine) & (filtered['GRADE'] == grade)]
+    filtered = filtered.sort_values(by='SCORE').head(20)
+    return restaurant_list, results, cuisines, unique_grades, filtered
+
+def current_rerun(dataset, backend, name, cuisine, grade): #Data work of one rerun of the current main().
+    restaurant_list = dataset.name_index.typeahead(name[:3]) #Tab2 now sends one page of suggestions instead of every name.
+    results = search_restaurants(backend, name, None)
+    cuisines = dataset.cuisines
+    unique_grades = dataset.grades
+    filtered = menu_driven_selection(backend, cuisine, grade, "All")
+    return restaurant_list, results, cuisines, unique_grades, filtered
+
+def measure(rerun, args, repeat): #Median wall time and peak traced allocation of one rerun.
+    rerun(*args) #Warm-up, also builds the lazily created indexes.
+    times = []
+    for _ in range(repeat): #Timed without tracemalloc, which slows allocation-heavy code several times over.
+        start = time.perf_counter()
+        rerun(*args)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    rerun(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "median_ms": round(statistics.median(times) * 1000, 2),
+        "max_ms": round(max(times) * 1000, 2),
+        "peak_alloc_mb": round(peak / 1024 ** 2, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the per-rerun latency and allocations of the app's data work.")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    df = data_store.load_dataset()
+    dataset = Dataset(df, data_store.dataset_version())
+    name = compact.code_counts(df['DBA']).index[0] #Most inspected restaurant, the heaviest realistic search.
+    cuisine = compact.code_counts(df['CUISINE DESCRIPTION']).index[0]
+    grade = 'A'
+
+    results = {
+        "rows": len(df),
+        "legacy": measure(legacy_rerun, (compact.decode_frame(df), name, cuisine, grade), args.repeat),
+        "current": measure(current_rerun, (dataset, create_backend(dataset), name, cuisine, grade), args.repeat), #Backend from NYC_INSPECTOR_BACKEND.
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"Rows: {results['rows']}")
+    for path in ("legacy", "current"):
+        stats = results[path]
+        print(f"{path:>8}: {stats['median_ms']} ms median, {stats['max_ms']} ms max, {stats['peak_alloc_mb']} MB peak allocation per rerun")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#Benchmark suite for the app's hot paths at several data sizes, on synthetic data (see synthetic_data.py), fully offline.
+#Every scale runs in a fresh process with its own snapshot folder, so the peak RSS of one scale does not leak into the next:
+#  load_data             CSV ingestion into a new snapshot (cold), then the snapshot reload the app does on start (warm)
+#  indexes               first-use build of the name / facet indexes, the restaurant model and the aggregate cube
+#  search_restaurants    chain name, substring, misspelt name (fuzzy fallback) and ZIP-only searches
+#  menu_driven_selection cuisine + grade with each critical flag choice, and the one-row-per-restaurant view
+#  tab4                  the three chart aggregations
+#  export                every Critical violation of the largest borough written as CSV
+#Query timings are medians over --repeat calls after a warm-up, plus the peak traced allocation of one call (bench_rerun.measure).
+#The results are written as JSON so runs on different versions can be compared:
+#  python bench_suite.py --scales 1 10 100 --out bench_results.json
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import compact
+import data_store
+import export
+import ingest
+import synthetic_data
+from app_v3 import menu_driven_selection, search_restaurants
+from bench_rerun import measure
+from cube import build_cube, rollup
+from dataset import Dataset
+from query_backend import BACKEND, create_backend
+
+DEFAULT_SCALES = [1, 10] #100x (~29M rows, several GB of CSV) is opt-in with --scales 1 10 100.
+
+def timed(function, *args): #Result and wall time of a single call.
+    start = time.perf_counter()
+    result = function(*args)
+    return result, round(time.perf_counter() - start, 3)
+
+def misspell(name): #Swaps two letters in the middle, e.g. 'Starbucks' -> 'Stabrucks'.
+    middle = len(name) // 2
+    return name[:middle - 1] + name[middle] + name[middle - 1] + name[middle + 1:] if len(name) > 3 else name
+
+def run_scale(csv_path, repeat, backend_name): #Runs inside the per-scale process; the snapshot folder comes from NYC_INSPECTOR_SNAPSHOT_DIR.
+    results = {}
+    (_, stats), seconds = timed(data_store.build_snapshot, csv_path)
+    results["load_data"] = {"ingest_seconds": seconds, "rows_read": stats["rows_read"], "rows_kept": stats["rows_kept"],
+                            "rows_per_sec": stats["rows_per_sec"], "frame_mb": stats["frame_mb"], "ingest_peak_rss_mb": stats["peak_rss_mb"]}
+    df, seconds = timed(data_store.load_dataset)
+    results["load_data"]["snapshot_load_seconds"] = seconds
+
+    dataset = Dataset(df, data_store.dataset_version())
+    results["indexes"] = {name: timed(lambda: getattr(dataset, name))[1] for name in ("name_index", "facet_index", "model", "cube")}
+    results["indexes"]["cube_rebuild_seconds"] = timed(build_cube, df)[1]
+    backend = create_backend(dataset, backend_name)
+
+    names = compact.code_counts(df['DBA'])
+    top_name = names.index[0] #Most inspected restaurant (a chain), the largest result before the limit.
+    local_name = names.index[len(names) // 2]
+    zip_code = int(compact.code_counts(df['ZIPCODE'].astype('category')).index[0])
+    results["search_restaurants"] = {
+        "chain_name": measure(search_restaurants, (backend, top_name, None), repeat),
+        "substring": measure(search_restaurants, (backend, "pizza", None), repeat),
+        "misspelt_name": measure(search_restaurants, (backend, misspell(local_name), None), repeat),
+        "zip_only": measure(search_restaurants, (backend, None, zip_code), repeat),
+        "typeahead": measure(dataset.name_index.typeahead, (top_name[:3],), repeat),
+    }
+
+    cuisine = compact.code_counts(df['CUISINE DESCRIPTION']).index[0]
+    results["menu_driven_selection"] = {
+        f"critical_{choice.lower().replace(' ', '_')}": measure(menu_driven_selection, (backend, cuisine, 'A', choice), repeat)
+        for choice in ("All", "Critical", "Not Critical")
+    }
+    results["menu_driven_selection"]["latest_per_restaurant"] = measure(dataset.model.current, ('A', cuisine, "All"), repeat)
+
+    results["tab4"] = {
+        "cuisine_counts": measure(backend.counts, ('CUISINE DESCRIPTION', 15), repeat),
+        "borough_counts": measure(backend.counts, ('BORO',), repeat),
+        "monthly_scores": measure(rollup, (dataset.cube, ['MONTH']), repeat),
+    }
+
+    borough = compact.code_counts(df['BORO']).index[0]
+    rows = np.flatnonzero(compact.category_mask(df['BORO'], borough) & compact.category_mask(df['CRITICAL FLAG'], 'Critical'))
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "export.csv")
+        results["export"] = {"rows": len(rows), **measure(export.write_export, (df.iloc[rows], "CSV", path), max(1, repeat // 5))}
+        results["export"]["file_mb"] = round(os.path.getsize(path) / 1024 ** 2, 2)
+
+    peak_rss = ingest.peak_rss_mb()
+    results["peak_rss_mb"] = round(peak_rss, 1) if peak_rss is not None else None
+    return results
+
+def git_commit(): #Commit the numbers belong to, None outside a git checkout.
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the app's hot paths on synthetic data at several scales.")
+    parser.add_argument("--scales", type=float, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", default=BACKEND, help="Query backend to measure, pandas or duckdb.")
+    parser.add_argument("--work-dir", default="bench_data", help="Generated CSVs are kept here and reused by later runs.")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--run-csv", help=argparse.SUPPRESS) #Internal: benchmark one CSV in this process and print JSON.
+    args = parser.parse_args()
+
+    if args.run_csv:
+        print(json.dumps(run_scale(args.run_csv, args.repeat, args.backend)))
+        return
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "backend": args.backend,
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "scales": [],
+    }
+    for scale in args.scales:
+        csv_path = os.path.join(args.work_dir, f"synthetic_{scale:g}x_seed{args.seed}.csv")
+        generate_seconds = None
+        if not os.path.exists(csv_path):
+            print(f"Generating {csv_path} ...", file=sys.stderr)
+            generate_seconds = round(synthetic_data.generate(csv_path, scale, args.seed)[2], 1)
+        snapshot_dir = os.path.join(args.work_dir, f"snapshots_{scale:g}x")
+        shutil.rmtree(snapshot_dir, ignore_errors=True) #Every run starts from a cold, empty snapshot folder.
+        print(f"Benchmarking scale {scale:g}x ...", file=sys.stderr)
+        environment = dict(os.environ, NYC_INSPECTOR_SNAPSHOT_DIR=snapshot_dir, NYC_INSPECTOR_OFFLINE="1")
+        command = [sys.executable, os.path.abspath(__file__), "--run-csv", csv_path, "--repeat", str(args.repeat), "--backend", args.backend]
+        output = subprocess.run(command, env=environment, capture_output=True, text=True, check=True).stdout
+        results = json.loads(output.strip().splitlines()[-1])
+        report["scales"].append({"scale": scale, "csv_mb": round(os.path.getsize(csv_path) / 1024 ** 2, 1),
+                                 "generate_seconds": generate_seconds, **results})
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    for entry in report["scales"]:
+        print(f"{entry['scale']:g}x: {entry['load_data']['rows_kept']} rows, ingest {entry['load_data']['ingest_seconds']} s, "
+              f"reload {entry['load_data']['snapshot_load_seconds']} s, search {entry['search_restaurants']['chain_name']['median_ms']} ms, "
+              f"explore {entry['menu_driven_selection']['critical_all']['median_ms']} ms, export {entry['export']['median_ms']} ms, "
+              f"peak RSS {entry['peak_rss_mb']} MB")
+    print(f"Results written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#Compact in-memory representation of the cleaned inspection table.
+#The text columns repeat a few hundred (or a few tens of thousands for DBA) distinct values millions of times,
+#so they are stored as pandas categoricals: one small integer code per row plus a single copy of every distinct string.
+#SCORE and ZIPCODE become small nullable integers. Filters and counts below work on the integer codes directly.
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+CATEGORY_COLUMNS = ['DBA', 'BORO', 'BUILDING', 'STREET', 'CUISINE DESCRIPTION', 'VIOLATION DESCRIPTION', 'CRITICAL FLAG', 'GRADE']
+INT_COLUMNS = {
+    'CAMIS': 'int32', #Establishment ids are 8 digits.
+    'SCORE': 'Int16', #Nullable, some inspections have no score yet.
+    'ZIPCODE': 'Int32', #Nullable, a few establishments have no ZIP code.
+}
+
+def encode_frame(df): #Converts a cleaned frame to categorical codes and small ints. INSPECTION DATE is already datetime64.
+    df = df.astype({column: 'category' for column in CATEGORY_COLUMNS if df[column].dtype != 'category'})
+    return df.astype(INT_COLUMNS)
+
+def concat_encoded(frames): #pd.concat turns categoricals with different categories back into strings, so categories are unioned first.
+    if len(frames) == 1:
+        return frames[0]
+    columns = {}
+    for column in frames[0].columns:
+        if column in CATEGORY_COLUMNS:
+            parts = [frame[column].cat.set_categories(frame[column].cat.categories.astype('str')) for frame in frames] #An all-missing part has untyped categories.
+            columns[column] = pd.Series(union_categoricals(parts), copy=False)
+        else:
+            columns[column] = pd.concat([frame[column] for frame in frames], ignore_index=True)
+    return pd.DataFrame(columns)
+
+def codes_of(series, values): #Integer codes of the given category values; values that never occur are skipped.
+    categories = series.cat.categories
+    return np.array([categories.get_loc(value) for value in values if value in categories], dtype=np.int64)
+
+def category_mask(series, value): #Same as series == value, comparing a single integer code per row.
+    codes = codes_of(series, [value])
+    if len(codes) == 0:
+        return np.zeros(len(series), dtype=bool)
+    return series.cat.codes.to_numpy() == codes[0]
+
+def contains_mask(series, text): #Case-insensitive substring match, tested once per distinct value and then mapped to rows by code.
+    matching = np.flatnonzero(series.cat.categories.str.contains(text, case=False, regex=False))
+    return np.isin(series.cat.codes.to_numpy(), matching)
+
+def code_counts(series): #value_counts() computed with a bincount over the codes, most frequent first.
+    codes = series.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(series.cat.categories))
+    counts = pd.Series(counts, index=series.cat.categories, name='count')
+    return counts[counts > 0].sort_values(ascending=False)
+
+def decode_frame(df): #Back to the plain object-string / float64 layout of the original load_data(), used for comparisons.
+    df = df.astype({column: object for column in CATEGORY_COLUMNS})
+    return df.astype({'CAMIS': 'int64', 'SCORE': 'float64', 'ZIPCODE': 'float64'})
+
+def memory_report(df): #Bytes per row for every column and in total, counting the strings themselves (deep=True).
+    usage = df.memory_usage(deep=True, index=False)
+    rows = max(len(df), 1)
+    report = pd.DataFrame({'dtype': df.dtypes.astype(str), 'bytes_per_row': (usage / rows).round(1)})
+    report.loc['TOTAL'] = ['', round(usage.sum() / rows, 1)]
+    return report
+
+def main(): #Prints the memory per row of the current snapshot, compact versus the original object layout: python compact.py
+    import data_store
+    parser = argparse.ArgumentParser(description="Compare memory per row of the compact and the original representation.")
+    parser.add_argument("--snapshot-dir", default=data_store.SNAPSHOT_DIR)
+    args = parser.parse_args()
+    df = data_store.load_snapshot(args.snapshot_dir)
+    if df is None:
+        raise SystemExit("No snapshot found. Build one first with: python data_store.py")
+    compact_report = memory_report(df)
+    original_report = memory_report(decode_frame(df))
+    print(f"Rows: {len(df)}")
+    print(pd.concat({'compact': compact_report, 'original': original_report}, axis=1).to_string())
+    print(f"Total: {compact_report.loc['TOTAL', 'bytes_per_row'] * len(df) / 1024 ** 2:.1f} MB compact vs "
+          f"{original_report.loc['TOTAL', 'bytes_per_row'] * len(df) / 1024 ** 2:.1f} MB original")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#Materialized aggregate cube for the Visual Insights tab.
+#Counts and score sums by borough x cuisine x grade x critical flag x month are computed once per dataset version
+#(a few tens of thousands of cells instead of millions of rows) and saved next to the snapshot. Every chart is a
+#small roll-up of the cube. A refresh only recomputes the months its delta touches, see refresh_cube().
+#The snapshot writers (data_store.build_snapshot, refresh.py) save the cube of every version they commit, so app
+#processes normally only read it. save_cube() is still safe when several app processes fall back to writing it at once.
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from pyarrow import feather
+
+import data_store
+
+DIMENSIONS = ['BORO', 'CUISINE DESCRIPTION', 'GRADE', 'CRITICAL FLAG', 'MONTH']
+MEASURES = ['rows', 'score_count', 'score_sum', 'score_sumsq'] #All additive, so any roll-up is a plain sum.
+
+def build_cube(df): #Aggregates cleaned rows into cube cells.
+    scores = df['SCORE'].astype('float64')
+    cells = pd.DataFrame({
+        'BORO': df['BORO'],
+        'CUISINE DESCRIPTION': df['CUISINE DESCRIPTION'],
+        'GRADE': df['GRADE'],
+        'CRITICAL FLAG': df['CRITICAL FLAG'],
+        'MONTH': df['INSPECTION DATE'].dt.to_period('M').dt.to_timestamp(),
+        'rows': 1,
+        'score_count': scores.notna().astype('int64'),
+        'score_sum': scores.fillna(0),
+        'score_sumsq': scores.fillna(0) ** 2,
+    })
+    cube = cells.groupby(DIMENSIONS, observed=True, dropna=False, as_index=False)[MEASURES].sum()
+    return cube.astype({dimension: object for dimension in DIMENSIONS[:-1]}) #Plain strings, so cubes of different versions concatenate cleanly.
+
+def rollup(cube, dimensions): #Sums the cube over every dimension not listed and adds mean/std of the score.
+    result = cube.groupby(dimensions, observed=True, as_index=False)[MEASURES].sum() if dimensions else cube[MEASURES].sum().to_frame().T
+    count = result['score_count'].where(result['score_count'] > 0)
+    result['mean_score'] = result['score_sum'] / count
+    result['std_score'] = np.sqrt((result['score_sumsq'] / count - result['mean_score'] ** 2).clip(lower=0))
+    return result
+
+def cube_path(version, snapshot_dir=data_store.SNAPSHOT_DIR):
+    return os.path.join(snapshot_dir, f"cube_v{version}.feather")
+
+def cube_version(file_name): #Version of a saved cube file name, None for anything else (e.g. another writer's temp file).
+    version = file_name[len("cube_v"):-len(".feather")]
+    return int(version) if file_name.startswith("cube_v") and file_name.endswith(".feather") and version.isdigit() else None
+
+def save_cube(cube, version, snapshot_dir=data_store.SNAPSHOT_DIR): #Saves the cube of a version and removes cubes of older versions.
+    path = cube_path(version, snapshot_dir)
+    handle, tmp_path = tempfile.mkstemp(dir=snapshot_dir, prefix=f"cube_v{version}.", suffix=".tmp") #One temp file per writer.
+    os.close(handle)
+    try:
+        cube.reset_index(drop=True).to_feather(tmp_path)
+        os.replace(tmp_path, path)
+    except OSError:
+        if not os.path.exists(path): #Losing the race to another writer of the same version (e.g. a locked file on Windows) is fine.
+            raise
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    for old_file in os.listdir(snapshot_dir): #Only older versions, a slower process must not delete the cube of a newer one.
+        old_version = cube_version(old_file)
+        if old_version is not None and old_version < version:
+            try:
+                os.remove(os.path.join(snapshot_dir, old_file))
+            except FileNotFoundError: #Already removed by another writer.
+                pass
+
+def load_cube(version, snapshot_dir=data_store.SNAPSHOT_DIR): #Saved cube of the given version, or None.
+    path = cube_path(version, snapshot_dir)
+    if not os.path.exists(path):
+        return None
+    return feather.read_table(path).to_pandas()
+
+def load_or_build_cube(df, version, snapshot_dir=data_store.SNAPSHOT_DIR): #Used by the app: aggregates the full frame only when no cube was saved for this version (e.g. a snapshot from an older release).
+    cube = load_cube(version, snapshot_dir)
+    if cube is None:
+        cube = build_cube(df)
+        if os.path.isdir(snapshot_dir):
+            save_cube(cube, version, snapshot_dir)
+    return cube
+
+def refresh_cube(old_version, new_version, since, snapshot_dir=data_store.SNAPSHOT_DIR): #Carries the cube over a refresh, re-aggregating only months from `since` on.
+    cube = load_cube(old_version, snapshot_dir)
+    if cube is None: #Nothing to carry over, aggregate the whole new version once here rather than in every app process.
+        cube = build_cube(data_store.load_snapshot(snapshot_dir))
+        save_cube(cube, new_version, snapshot_dir)
+        return cube
+    month = pd.Timestamp(since).to_period('M').to_timestamp()
+    recent = data_store.load_rows_since(month, snapshot_dir) #Rows of the touched months only, read from the memory-mapped segments.
+    cube = pd.concat([cube[cube['MONTH'] < month], build_cube(recent)], ignore_index=True)
+    save_cube(cube, new_version, snapshot_dir)
+    return cube
@@ -0,0 +1,192 @@
+#Local snapshot store for the cleaned NYC inspection dataset.
+#The first run downloads and cleans the CSV once, then saves the cleaned frame as an uncompressed Feather (Arrow IPC) file.
+#Later runs read that file back instead of re-downloading, so a cold start takes seconds and needs no network. The read is a
+#columnar copy with no parsing: the file is memory-mapped, but to_pandas() still copies the columns into process memory.
+#Processes that should share one copy of the data attach to shared_dataset.py instead.
+#Incremental refreshes (see refresh.py) add small delta segments on top of the base file instead of rewriting it.
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import feather
+
+import compact
+import ingest
+from ingest import clean_data
+
+DATA_URL = "https://data.cityofnewyork.us/api/views/43nn-pn8j/rows.csv?accessType=DOWNLOAD" #NYC Open Data inspection dataset.
+SNAPSHOT_DIR = os.environ.get("NYC_INSPECTOR_SNAPSHOT_DIR", "snapshots") #Folder holding the versioned snapshot files and manifest.
+SOURCE = os.environ.get("NYC_INSPECTOR_SOURCE", DATA_URL) #Where a fresh snapshot is built from: the Open Data URL or a local CSV/Feather/Parquet fixture.
+OFFLINE = os.environ.get("NYC_INSPECTOR_OFFLINE", "0") == "1" #Offline mode never touches the network, only snapshots and local files.
+SCHEMA_VERSION = 6 #Bump when COLUMNS or the cleaning rules change so that stale snapshots get rebuilt.
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = "build.lock" #Held while a snapshot is built, so workers starting cold at once build it only once.
+LOCK_TIMEOUT = 3600 #Seconds after which a lock left behind by a crashed builder is ignored.
+
+ROW_KEY = ['CAMIS', 'INSPECTION DATE', 'VIOLATION DESCRIPTION'] #Identifies one violation row; a newer row with the same key replaces the older one.
+
+def is_remote(source): #True for http(s) URLs, False for local paths.
+    return str(source).startswith(("http://", "https://"))
+
+def read_source(source): #Reads a raw (uncleaned) dataset from a URL or local file, picking the reader by file extension.
+    path = str(source).lower()
+    if path.endswith((".feather", ".arrow")):
+        return pd.read_feather(source)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(source)
+    return pd.read_csv(source, dtype=ingest.DTYPES) #Same types as the chunked reader; clean_data() applies them again for the other formats.
+
+def ingest_source(source): #Returns the cleaned frame and ingestion stats. CSVs are streamed in chunks (see ingest.py).
+    path = str(source).lower()
+    if path.endswith((".feather", ".arrow", ".parquet")):
+        return clean_data(read_source(source)), None
+    return ingest.read_csv_chunked(source)
+
+def read_manifest(snapshot_dir=SNAPSHOT_DIR): #Returns the manifest dict, or None when no snapshot has been saved yet.
+    path = os.path.join(snapshot_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def temp_path(snapshot_dir, file_name): #Unique temp file next to file_name, so concurrent writers never share one.
+    handle, path = tempfile.mkstemp(dir=snapshot_dir, prefix=file_name + ".", suffix=".tmp")
+    os.close(handle)
+    return path
+
+def write_manifest(manifest, snapshot_dir=SNAPSHOT_DIR): #Writes to a temp file and renames it, so readers never see a half-written manifest.
+    path = os.path.join(snapshot_dir, MANIFEST_NAME)
+    tmp_path = temp_path(snapshot_dir, MANIFEST_NAME)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+@contextmanager
+def snapshot_lock(snapshot_dir=SNAPSHOT_DIR): #Exclusive lock file (O_CREAT | O_EXCL); other processes wait here until it is released.
+    os.makedirs(snapshot_dir, exist_ok=True)
+    path = os.path.join(snapshot_dir, LOCK_NAME)
+    while True:
+        try:
+            handle = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > LOCK_TIMEOUT: #The builder died without releasing it.
+                    os.remove(path)
+            except FileNotFoundError: #Released in the meantime.
+                pass
+            time.sleep(0.5)
+    try:
+        os.write(handle, str(os.getpid()).encode())
+        os.close(handle)
+        yield
+    finally:
+        os.remove(path)
+
+def dataset_version(snapshot_dir=SNAPSHOT_DIR): #Current snapshot version (0 when there is none). Caches can key on this.
+    manifest = read_manifest(snapshot_dir)
+    return manifest["version"] if manifest else 0
+
+def write_segment(df, version, snapshot_dir=SNAPSHOT_DIR): #Writes one cleaned frame as an uncompressed (memory-mappable) Feather file and returns its name.
+    os.makedirs(snapshot_dir, exist_ok=True)
+    file_name = f"v{version}.feather"
+    tmp_path = temp_path(snapshot_dir, file_name)
+    df.reset_index(drop=True).to_feather(tmp_path, compression="uncompressed")
+    os.replace(tmp_path, os.path.join(snapshot_dir, file_name))
+    return file_name
+
+def commit_segments(files, rows, watermark, source=None, snapshot_dir=SNAPSHOT_DIR): #Points the manifest at a new list of segment files and bumps the version.
+    version = dataset_version(snapshot_dir) + 1
+    write_manifest({
+        "version": version,
+        "schema_version": SCHEMA_VERSION,
+        "files": files, #Base file first, then delta segments in the order they were applied.
+        "rows": rows, #Stored rows across all segments, before de-duplication.
+        "watermark": watermark.isoformat() if watermark is not None else None, #Latest INSPECTION DATE in the data, refreshes fetch from here.
+        "source": str(source) if source is not None else None,
+        "created_at": pd.Timestamp.now(tz="UTC").isoformat(),
+    }, snapshot_dir)
+    for old_file in os.listdir(snapshot_dir): #Removes segment files that are no longer part of the snapshot.
+        if old_file.startswith("v") and old_file.endswith(".feather") and old_file not in files:
+            os.remove(os.path.join(snapshot_dir, old_file))
+    return version
+
+def save_snapshot(df, source=None, snapshot_dir=SNAPSHOT_DIR): #Saves an already cleaned frame as a new base snapshot and returns its version.
+    version = dataset_version(snapshot_dir) + 1
+    file_name = write_segment(df, version, snapshot_dir)
+    return commit_segments([file_name], len(df), df['INSPECTION DATE'].max() if len(df) else None, source, snapshot_dir)
+
+def merge_segments(frames): #Stacks the base and delta frames; rows of a later segment replace earlier rows with the same ROW_KEY.
+    if len(frames) == 1:
+        return frames[0]
+    df = compact.concat_encoded(frames)
+    segment = np.repeat(np.arange(len(frames)), [len(frame) for frame in frames])
+    latest = pd.Series(segment).groupby([df[column] for column in ROW_KEY], observed=True, dropna=False).transform('max')
+    return df[segment == latest.to_numpy()].reset_index(drop=True) #Rows within one segment never replace each other, same as a fresh load.
+
+def has_snapshot(snapshot_dir=SNAPSHOT_DIR): #True when a snapshot with the current schema and all its files exists. Reads only the manifest.
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None or manifest.get("schema_version") != SCHEMA_VERSION:
+        return False
+    return all(os.path.exists(os.path.join(snapshot_dir, file_name)) for file_name in manifest["files"])
+
+def load_snapshot(snapshot_dir=SNAPSHOT_DIR): #Reads the current snapshot into memory, or returns None if it is missing or was built with an older schema.
+    if not has_snapshot(snapshot_dir):
+        return None
+    manifest = read_manifest(snapshot_dir)
+    paths = [os.path.join(snapshot_dir, file_name) for file_name in manifest["files"]]
+    return merge_segments([feather.read_table(path, memory_map=True).to_pandas() for path in paths]) #Mapped rather than buffered, then copied once into the frame.
+
+def load_rows_since(date, snapshot_dir=SNAPSHOT_DIR): #Rows inspected on or after date. The filter runs on the memory-mapped Arrow data, only matches are converted.
+    manifest = read_manifest(snapshot_dir)
+    frames = []
+    for file_name in manifest["files"]:
+        table = feather.read_table(os.path.join(snapshot_dir, file_name), memory_map=True)
+        since = pa.scalar(pd.Timestamp(date).to_pydatetime(), type=table.schema.field('INSPECTION DATE').type)
+        frames.append(table.filter(pc.greater_equal(table['INSPECTION DATE'], since)).to_pandas())
+    return merge_segments(frames)
+
+def build_snapshot(source=SOURCE, snapshot_dir=SNAPSHOT_DIR, offline=OFFLINE): #Reads the raw source, cleans it and saves it as a new snapshot.
+    with snapshot_lock(snapshot_dir):
+        return write_snapshot(source, snapshot_dir, offline)
+
+def write_snapshot(source=SOURCE, snapshot_dir=SNAPSHOT_DIR, offline=OFFLINE): #Body of build_snapshot(), the caller holds snapshot_lock().
+    if offline and is_remote(source):
+        raise RuntimeError(f"Offline mode is on but the data source is a URL ({source}). Set NYC_INSPECTOR_SOURCE to a local file.")
+    import cube #cube.py imports this module, so it is imported here rather than at the top.
+    df, stats = ingest_source(source)
+    version = save_snapshot(df, source, snapshot_dir)
+    cube.save_cube(cube.build_cube(df), version, snapshot_dir) #Single writer of the first cube, app processes only read it.
+    return df, stats
+
+def load_dataset(source=SOURCE, snapshot_dir=SNAPSHOT_DIR, offline=OFFLINE): #Snapshot first, then the source (downloaded only when not offline).
+    df = load_snapshot(snapshot_dir)
+    if df is not None:
+        return df
+    with snapshot_lock(snapshot_dir): #One cold-starting process builds, the others wait and then read its snapshot.
+        df = load_snapshot(snapshot_dir)
+        if df is None:
+            df, _ = write_snapshot(source, snapshot_dir, offline)
+    return df
+
+def main(): #Command line entry point to (re)build the snapshot ahead of a deploy: python data_store.py --source nyc.csv
+    parser = argparse.ArgumentParser(description="Build the local snapshot of the NYC inspection dataset.")
+    parser.add_argument("--source", default=SOURCE, help="Open Data URL or local CSV/Feather/Parquet file.")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR)
+    parser.add_argument("--offline", action="store_true", default=OFFLINE, help="Refuse to download from a URL.")
+    args = parser.parse_args()
+    df, stats = build_snapshot(args.source, args.snapshot_dir, args.offline)
+    print(f"Saved snapshot v{dataset_version(args.snapshot_dir)} with {len(df)} rows to {args.snapshot_dir}")
+    if stats:
+        print(f"Ingested {stats['rows_read']} rows at {stats['rows_per_sec']} rows/sec, peak RSS {stats['peak_rss_mb']} MB")
+
+if __name__ == "__main__":
+    main()
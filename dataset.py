@@ -0,0 +1,54 @@
+#Read-only handle on one version of the cleaned dataset, shared by every Streamlit session and rerun.
+#The frame is never copied or modified: queries go through the indexes and return small row selections (df.iloc),
+#and the widget option lists are computed once here instead of on every rerun.
+#In shared mode the large index arrays come from shared_dataset.attach_indexes() and are only mapped, not rebuilt.
+
+from functools import cached_property
+
+import compact
+from cube import load_or_build_cube
+from entities import InspectionModel
+from facet_index import FacetIndex
+from history import InspectionHistory
+from name_index import NameIndex
+from spatial_index import SpatialIndex
+from violation_index import ViolationIndex
+
+class Dataset:
+    def __init__(self, df, version, shared=None):
+        self.df = df #Shared between sessions, treat as read-only.
+        self.version = version
+        self.shared = shared or {} #Index name -> published arrays; indexes missing here are built in this process.
+
+        #Option lists for the widgets, only values that actually occur. Restaurant names are served page by page by name_index.typeahead().
+        self.cuisines = sorted(compact.code_counts(df['CUISINE DESCRIPTION']).index)
+        self.grades = sorted(compact.code_counts(df['GRADE']).index)
+        self.boroughs = sorted(compact.code_counts(df['BORO']).index)
+
+    @cached_property
+    def name_index(self): #Built on first use, then kept for the lifetime of this version.
+        return NameIndex(self.df, self.shared.get('name_index'))
+
+    @cached_property
+    def facet_index(self):
+        return FacetIndex(self.df, self.shared.get('facet_index'))
+
+    @cached_property
+    def model(self): #Restaurant / inspection / violation tables with the latest inspection of every restaurant.
+        return InspectionModel(self.df, self.shared.get('model'))
+
+    @cached_property
+    def history(self): #Rolling scores, grade transitions and quarter-over-quarter rankings over every restaurant's inspections.
+        return InspectionHistory(self.model, self.shared.get('history'))
+
+    @cached_property
+    def spatial_index(self): #Grid over the restaurants' locations plus the ZIP code and borough lookups.
+        return SpatialIndex(self.df, self.model.restaurants, self.shared.get('spatial_index'))
+
+    @cached_property
+    def violation_index(self): #Keyword search over the violation descriptions with bitmap filters.
+        return ViolationIndex(self.df, self.shared.get('violation_index'))
+
+    @cached_property
+    def cube(self): #Aggregate cube for the charts, read from the snapshot folder when it was already built for this version.
+        return load_or_build_cube(self.df, self.version)
@@ -0,0 +1,90 @@
+#Normalized restaurant / inspection / violation model, built once per dataset version.
+#The cleaned frame has one row per violation, so a restaurant and an inspection repeat on many rows. Here they are split into
+#  restaurants: one row per establishment (CAMIS), index = restaurant_id
+#  inspections: one row per (restaurant, INSPECTION DATE), index = inspection_id, sorted by restaurant then date
+#               (the cleaned data has no inspection id, so two inspections of a restaurant on one day form one inspection:
+#               its SCORE and GRADE are taken from the highest-scoring row of that day, the violation counts cover the whole day)
+#  violations:  one row per frame row, linked to its inspection by inspection_id
+#plus the latest inspection of every restaurant, so "restaurants currently graded A in cuisine X" is a dictionary lookup
+#over the restaurants instead of a scan and sort over millions of violation rows.
+
+import numpy as np
+import pandas as pd
+
+RESTAURANT_COLUMNS = ['CAMIS', 'DBA', 'BORO', 'BUILDING', 'STREET', 'ZIPCODE', 'CUISINE DESCRIPTION', 'Latitude', 'Longitude']
+
+class InspectionModel:
+    SHARED = ('inspection_of_row', 'first_rows', 'inspections') #Per-row and per-inspection data that shared_dataset.publish() writes once per host.
+
+    def __init__(self, df, shared=None):
+        if shared: #Mapped read-only from the shared dataset instead of being built again.
+            self.inspection_of_row, self.first_rows, self.inspections = (shared[name] for name in self.SHARED)
+        else:
+            self.build_inspections(df)
+        self.inspections.index.name = 'inspection_id'
+        restaurant_id = self.inspections['restaurant_id'].to_numpy() #Non-decreasing, so each restaurant's inspections are contiguous.
+
+        self.violations = pd.DataFrame({
+            'inspection_id': self.inspection_of_row,
+            'VIOLATION DESCRIPTION': df['VIOLATION DESCRIPTION'].array, #Categorical arrays, the codes are shared rather than decoded.
+            'CRITICAL FLAG': df['CRITICAL FLAG'].array,
+        })
+
+        #Offsets of each restaurant's inspections; the last one of each run is its latest inspection.
+        self.inspection_offsets = np.concatenate([[0], np.cumsum(np.bincount(restaurant_id))])
+        latest_inspection = self.inspection_offsets[1:] - 1
+        latest_rows = self.first_rows[latest_inspection]
+        self.restaurants = df[RESTAURANT_COLUMNS].iloc[latest_rows].reset_index(drop=True) #Attributes as of the latest inspection.
+        building, street = (self.restaurants[column].astype('str').fillna('') for column in ('BUILDING', 'STREET')) #Text whatever type the source had.
+        self.restaurants['ADDRESS'] = (building + ' ' + street).str.strip()
+        self.restaurants.index.name = 'restaurant_id'
+
+        latest = self.inspections.iloc[latest_inspection].reset_index()
+        self.latest = pd.concat([self.restaurants, latest.drop(columns='restaurant_id')], axis=1)
+        self.latest.index.name = 'restaurant_id'
+        self.latest_by_grade_cuisine = self.latest.groupby(['GRADE', 'CUISINE DESCRIPTION'], observed=True).indices #(grade, cuisine) -> restaurant ids.
+
+    def build_inspections(self, df): #Groups the frame rows into inspections, sets inspection_of_row, first_rows and inspections.
+        rows = np.arange(len(df))
+        dates = df['INSPECTION DATE'].to_numpy()
+        restaurant_of_row, _ = pd.factorize(df['CAMIS'].to_numpy())
+
+        #Sort rows by (restaurant, date, highest score first); a new inspection starts wherever restaurant or date changes.
+        score = df['SCORE'].to_numpy(dtype='float64', na_value=-np.inf) #Unscored rows come last within their day.
+        order = np.lexsort((rows, -score, dates, restaurant_of_row))
+        sorted_restaurants = restaurant_of_row[order]
+        sorted_dates = dates[order]
+        starts = np.ones(len(df), dtype=bool)
+        starts[1:] = (sorted_restaurants[1:] != sorted_restaurants[:-1]) | (sorted_dates[1:] != sorted_dates[:-1])
+        self.inspection_of_row = np.empty(len(df), dtype=np.int64)
+        self.inspection_of_row[order] = np.cumsum(starts) - 1
+        self.first_rows = order[starts] #Row with the day's highest score, SCORE and GRADE are read from it so they always belong together.
+
+        critical = (df['CRITICAL FLAG'] == 'Critical').to_numpy()
+        inspection_count = len(self.first_rows)
+        self.inspections = pd.DataFrame({
+            'restaurant_id': sorted_restaurants[starts],
+            'INSPECTION DATE': dates[self.first_rows],
+            'SCORE': df['SCORE'].iloc[self.first_rows].reset_index(drop=True),
+            'GRADE': df['GRADE'].iloc[self.first_rows].reset_index(drop=True),
+            'violations': np.bincount(self.inspection_of_row, minlength=inspection_count),
+            'critical_violations': np.bincount(self.inspection_of_row, weights=critical, minlength=inspection_count).astype(np.int32),
+        })
+
+    def inspections_of(self, restaurant_id): #All inspections of one restaurant, oldest first.
+        return self.inspections.iloc[self.inspection_offsets[restaurant_id]:self.inspection_offsets[restaurant_id + 1]]
+
+    def current(self, grade=None, cuisine=None, critical=None, k=20): #Restaurants by their latest inspection, lowest score first.
+        if grade and cuisine:
+            latest = self.latest.iloc[self.latest_by_grade_cuisine.get((grade, cuisine), [])]
+        else:
+            latest = self.latest
+            if grade:
+                latest = latest[latest['GRADE'] == grade]
+            if cuisine:
+                latest = latest[latest['CUISINE DESCRIPTION'] == cuisine]
+        if critical == "Critical": #Latest inspection found at least one critical violation.
+            latest = latest[latest['critical_violations'] > 0]
+        elif critical == "Not Critical":
+            latest = latest[latest['critical_violations'] == 0]
+        return latest.sort_values(by='SCORE').head(k)
@@ -0,0 +1,86 @@
+#Exports of query results as CSV, gzip-compressed CSV or Parquet.
+#The file is written chunk by chunk, so only one chunk of rows is ever decoded to text at a time, and the app only
+#runs the export when the user clicks download (st.download_button with a callable), not on every rerun.
+#Large exports can also be written straight to disk from the command line:
+#  python export.py --boro Brooklyn --critical Critical --format Parquet --out brooklyn_critical.parquet
+
+import argparse
+import gzip
+import os
+import tempfile
+
+import numpy as np
+
+import compact
+import data_store
+
+FORMATS = { #Label -> (file extension, MIME type)
+    "CSV": (".csv", "text/csv"),
+    "CSV (gzip)": (".csv.gz", "application/gzip"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+CHUNK_ROWS = 50000
+
+def chunks(frame, chunk_rows=CHUNK_ROWS): #Consecutive row slices; an empty frame still yields one (empty) slice for the header/schema.
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+def write_export(frame, export_format, path, transform=None, chunk_rows=CHUNK_ROWS): #Streams frame to path, applying transform (e.g. column renames) per chunk.
+    parts = (transform(chunk) if transform else chunk for chunk in chunks(frame, chunk_rows))
+    if export_format == "Parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for part in parts: #One row group per chunk; later chunks are cast to the first chunk's schema.
+                table = pa.Table.from_pandas(part, schema=writer.schema if writer else None, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    elif export_format in FORMATS:
+        opener = gzip.open if export_format == "CSV (gzip)" else open
+        with opener(path, "wt", encoding="utf-8", newline="") as f:
+            for position, part in enumerate(parts):
+                part.to_csv(f, header=position == 0, index=False)
+    else:
+        raise ValueError(f"Unknown export format '{export_format}', expected one of {list(FORMATS)}.")
+
+def export_bytes(frame, export_format, transform=None): #File contents for st.download_button, built through a temporary file.
+    handle, path = tempfile.mkstemp(suffix=FORMATS[export_format][0])
+    os.close(handle)
+    try:
+        write_export(frame, export_format, path, transform)
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+def file_name(stem, export_format):
+    return stem + FORMATS[export_format][0]
+
+def main(): #Writes every row matching the given filters, without the app and without the top-20 limit.
+    parser = argparse.ArgumentParser(description="Export inspection rows matching the filters.")
+    parser.add_argument("--boro")
+    parser.add_argument("--cuisine")
+    parser.add_argument("--grade")
+    parser.add_argument("--critical", choices=["Critical", "Not Critical"])
+    parser.add_argument("--format", choices=list(FORMATS), default="CSV")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--snapshot-dir", default=data_store.SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    df = data_store.load_dataset(snapshot_dir=args.snapshot_dir)
+    mask = np.ones(len(df), dtype=bool)
+    for column, value in (("BORO", args.boro), ("CUISINE DESCRIPTION", args.cuisine), ("GRADE", args.grade), ("CRITICAL FLAG", args.critical)):
+        if value:
+            mask &= compact.category_mask(df[column], value)
+    rows = np.flatnonzero(mask)
+    write_export(df.iloc[rows], args.format, args.out)
+    print(f"Exported {len(rows)} rows to {args.out}")
+
+if __name__ == "__main__":
+    main()
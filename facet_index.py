@@ -0,0 +1,54 @@
+#Composite (cuisine, grade, critical flag) index for the Explore tab, built once per dataset version.
+#All rows are sorted once by (cuisine, grade, critical flag, SCORE), so every combination owns a contiguous slice
+#that is already ordered by score. The top k of one combination is the head of its slice, and "All" on any dimension
+#merges the heads of the matching slices, so a query reads O(k * combinations) rows instead of the whole frame.
+#Row ids are positions in the frame the index was built from (use df.iloc).
+
+import itertools
+
+import numpy as np
+
+CRITICAL_FILTERS = ("Critical", "Not Critical") #Radio choices that filter; anything else ("All", None) means every flag.
+
+class FacetIndex:
+    SHARED = ('score', 'order') #Per-row arrays that shared_dataset.publish() writes once for every process on the host.
+
+    def __init__(self, df, shared=None):
+        self.columns = ['CUISINE DESCRIPTION', 'GRADE', 'CRITICAL FLAG']
+        self.categories = [df[column].cat.categories for column in self.columns]
+        codes = [df[column].cat.codes.to_numpy().astype(np.int64) for column in self.columns] #-1 marks a missing value.
+        if shared: #Mapped read-only from the shared dataset instead of being built again.
+            self.score, self.order = (shared[name] for name in self.SHARED)
+        else:
+            self.score = df['SCORE'].to_numpy(dtype='float64', na_value=np.nan) #Missing scores sort last, like sort_values().
+            rows = np.arange(len(df))
+            self.order = np.lexsort((rows, self.score, codes[2], codes[1], codes[0])) #Last key is the primary one.
+
+        #(cuisine code, grade code, flag code) -> (start, end) of its slice in self.order.
+        sorted_codes = np.stack([code[self.order] for code in codes], axis=1)
+        starts = np.flatnonzero(np.any(np.diff(sorted_codes, axis=0) != 0, axis=1)) + 1
+        starts = np.concatenate([[0], starts]) if len(df) else starts
+        ends = np.append(starts[1:], len(df))
+        self.slices = {tuple(sorted_codes[start]): (start, end) for start, end in zip(starts, ends)}
+
+    def dimension_codes(self, position, value): #Codes to include for one dimension: every code for "All", else the code of value.
+        categories = self.categories[position]
+        if value is None:
+            return list(range(-1, len(categories)))
+        return [categories.get_loc(value)] if value in categories else []
+
+    def top_k(self, cuisine=None, grade=None, critical=None, k=20): #Row ids of the k lowest scores for the selection, lowest first; k=None returns all of them.
+        selection = [
+            self.dimension_codes(0, cuisine or None),
+            self.dimension_codes(1, grade or None),
+            self.dimension_codes(2, critical if critical in CRITICAL_FILTERS else None),
+        ]
+        heads = []
+        for key in itertools.product(*selection):
+            if key in self.slices:
+                start, end = self.slices[key]
+                heads.append(self.order[start:end if k is None else min(end, start + k)]) #Each slice is score-sorted, only its head can reach the top k.
+        if not heads:
+            return np.array([], dtype=np.int64)
+        rows = np.concatenate(heads)
+        return rows[np.lexsort((rows, self.score[rows]))][:k]
@@ -0,0 +1,87 @@
+#Inspection history and trends across every restaurant, built once per dataset version.
+#InspectionModel.inspections is sorted by restaurant and then date, and inspection_offsets marks where each restaurant's
+#run starts, so every restaurant's scores already sit in one contiguous slice. Rolling averages, the previous inspection,
+#grade transitions and "who got worse this quarter" are computed for all restaurants at once with prefix sums and
+#shifted arrays over those slices, never with a per-restaurant Python loop.
+
+import numpy as np
+import pandas as pd
+
+ROLLING_WINDOW = 3 #Inspections averaged by the rolling score.
+
+class InspectionHistory:
+    SHARED = ('score', 'previous', 'rolling') #Per-inspection arrays that shared_dataset.publish() writes once for every process on the host.
+
+    def __init__(self, model, shared=None):
+        self.model = model
+        inspections = model.inspections
+        self.restaurant_id = inspections['restaurant_id'].to_numpy()
+        self.dates = inspections['INSPECTION DATE'].to_numpy()
+        self.grades = inspections['GRADE'].cat.categories
+        self.grade_code = inspections['GRADE'].cat.codes.to_numpy()
+        if shared: #Mapped read-only from the shared dataset instead of being computed again.
+            self.score, self.previous, self.rolling = (shared[name] for name in self.SHARED)
+        else:
+            self.score = inspections['SCORE'].to_numpy(dtype='float64', na_value=np.nan)
+            positions = np.arange(len(inspections))
+            first = model.inspection_offsets[self.restaurant_id] #Position of each inspection's restaurant's first inspection.
+
+            #Previous inspection of the same restaurant, -1 for a restaurant's first one.
+            self.previous = np.where(positions > first, positions - 1, -1)
+
+            #Mean score of the last ROLLING_WINDOW inspections (unscored ones skipped), from prefix sums clipped at the restaurant's first inspection.
+            scored = ~np.isnan(self.score)
+            score_sums = np.concatenate([[0], np.cumsum(np.where(scored, self.score, 0))])
+            score_counts = np.concatenate([[0], np.cumsum(scored)])
+            window_start = np.maximum(positions - ROLLING_WINDOW + 1, first)
+            counts = score_counts[positions + 1] - score_counts[window_start]
+            self.rolling = (score_sums[positions + 1] - score_sums[window_start]) / np.where(counts > 0, counts, np.nan)
+
+        self.quarters = sorted(pd.PeriodIndex(self.dates, freq='Q').unique(), reverse=True) #Quarters with inspections, newest first.
+
+    def history_of(self, restaurant_id): #One restaurant's inspections, oldest first, with the rolling score.
+        start, end = self.model.inspection_offsets[restaurant_id], self.model.inspection_offsets[restaurant_id + 1]
+        history = self.model.inspections.iloc[start:end][['INSPECTION DATE', 'SCORE', 'GRADE', 'violations', 'critical_violations']].copy()
+        history['ROLLING SCORE'] = self.rolling[start:end]
+        return history
+
+    def period_mask(self, quarter): #Inspections dated inside the quarter (a pandas Period or a string such as '2024Q3').
+        quarter = pd.Period(quarter, freq='Q')
+        return (self.dates >= quarter.start_time.to_datetime64()) & (self.dates <= quarter.end_time.to_datetime64())
+
+    def transitions(self, quarter=None): #Grade before -> grade after, counted over consecutive inspections (those dated in the quarter).
+        current = np.flatnonzero(self.previous >= 0)
+        if quarter is not None:
+            current = current[self.period_mask(quarter)[current]]
+        before, after = self.grade_code[self.previous[current]], self.grade_code[current]
+        graded = (before >= 0) & (after >= 0)
+        size = len(self.grades)
+        counts = np.bincount(before[graded] * size + after[graded], minlength=size * size).reshape(size, size)
+        return pd.DataFrame(counts, index=pd.Index(self.grades, name='From'), columns=pd.Index(self.grades, name='To'))
+
+    def worsening(self, quarter, k=20): #Restaurants whose latest score in the quarter rose most over their last score before it.
+        in_quarter = self.period_mask(quarter)
+        positions = np.flatnonzero(in_quarter)
+        restaurants = self.restaurant_id[positions]
+        new_run = np.ones(len(positions), dtype=bool)
+        new_run[1:] = restaurants[1:] != restaurants[:-1]
+        first_in_quarter = positions[new_run] #Runs are contiguous, so a restaurant's quarter inspections follow each other.
+        last_in_quarter = positions[np.append(new_run[1:], True)]
+        before = self.previous[first_in_quarter] #Latest inspection before the quarter started.
+        keep = before >= 0
+        before, last = before[keep], last_in_quarter[keep]
+
+        change = self.score[last] - self.score[before]
+        worse = np.flatnonzero(change > 0)
+        ranked = worse[np.lexsort((self.rolling[last[worse]] - self.rolling[before[worse]], change[worse]))[::-1]][:k] #Biggest jump first, then the bigger rolling-score rise.
+        before, last = before[ranked], last[ranked]
+        result = self.model.restaurants.iloc[self.restaurant_id[last]][['DBA', 'BORO', 'CUISINE DESCRIPTION']].reset_index()
+        result['PREVIOUS DATE'] = self.dates[before]
+        result['PREVIOUS SCORE'] = self.score[before]
+        result['PREVIOUS GRADE'] = pd.Categorical.from_codes(self.grade_code[before], categories=self.grades)
+        result['INSPECTION DATE'] = self.dates[last]
+        result['SCORE'] = self.score[last]
+        result['GRADE'] = pd.Categorical.from_codes(self.grade_code[last], categories=self.grades)
+        result['SCORE CHANGE'] = change[ranked]
+        result['ROLLING SCORE'] = self.rolling[last]
+        return result
@@ -0,0 +1,103 @@
+#Bounded-memory ingestion of the raw inspection CSV.
+#The CSV is read in chunks, parsing only the columns the app uses with explicit dtypes, and every chunk is cleaned
+#before the next one is read. Peak memory stays close to the size of the final cleaned frame instead of several times it.
+
+import argparse
+import sys
+import time
+from urllib.request import urlopen
+
+import pandas as pd
+
+import compact
+
+try:
+    import resource #Unix only, used for the peak RSS figure.
+except ImportError:
+    resource = None
+
+COLUMNS = ['CAMIS', 'DBA', 'BORO', 'BUILDING', 'STREET', 'CUISINE DESCRIPTION', 'INSPECTION DATE',
+           'VIOLATION DESCRIPTION', 'CRITICAL FLAG', 'GRADE', 'SCORE', 'ZIPCODE', 'Latitude', 'Longitude'] #Columns used by the app. CAMIS (establishment id) identifies a restaurant.
+DTYPES = {
+    'CAMIS': 'int64',
+    'DBA': 'str',
+    'BORO': 'str',
+    'BUILDING': 'str', #House numbers such as '88-10' are text.
+    'STREET': 'str',
+    'CUISINE DESCRIPTION': 'str',
+    'INSPECTION DATE': 'str', #Parsed with DATE_FORMAT after reading, which is much faster than letting pandas guess.
+    'VIOLATION DESCRIPTION': 'str',
+    'CRITICAL FLAG': 'str',
+    'GRADE': 'str',
+    'SCORE': 'float32', #Floats because both columns have missing values.
+    'ZIPCODE': 'float32',
+    'Latitude': 'float32', #float32 keeps NYC coordinates to well under a metre.
+    'Longitude': 'float32',
+}
+DATE_FORMAT = "%m/%d/%Y" #Format of INSPECTION DATE in the Open Data CSV export, e.g. 05/28/2025.
+CHUNK_SIZE = 100000 #Rows parsed per chunk.
+
+def apply_schema(df): #Casts to DTYPES, so Feather/Parquet files and deltas read with guessed types match the chunked CSV path.
+    dtypes = dict(DTYPES)
+    if pd.api.types.is_datetime64_any_dtype(df['INSPECTION DATE']): #Already parsed, e.g. by refresh.fetch_delta.
+        del dtypes['INSPECTION DATE']
+    for column, dtype in dtypes.items():
+        values = df[column]
+        if dtype == 'str' and pd.api.types.is_float_dtype(values) and (values.dropna() % 1 == 0).all():
+            df[column] = values.astype('Int64') #House numbers guessed as floats (because of gaps) become '88', not '88.0'.
+    return df.astype(dtypes)
+
+def clean_data(df): #Same cleaning as the original load_data(): keep needed columns, drop incomplete rows, parse dates, title-case names.
+    #The result is dictionary-encoded (see compact.py), so every chunk is already small before the chunks are joined.
+    df = apply_schema(df[COLUMNS].copy())
+    df.dropna(subset=['DBA', 'GRADE'], inplace=True) #Removes rows where the restaurant name or grade is missing.
+    if not pd.api.types.is_datetime64_any_dtype(df['INSPECTION DATE']):
+        df['INSPECTION DATE'] = pd.to_datetime(df['INSPECTION DATE'], format=DATE_FORMAT, errors='coerce') #Invalid dates become NaT and are dropped below.
+    df.dropna(subset=['INSPECTION DATE'], inplace=True)
+    df['DBA'] = df['DBA'].str.title() #Capitalizes the restaurant names consistently.
+    for column in ['Latitude', 'Longitude']: #The export uses 0 for establishments without a geocode.
+        df[column] = df[column].astype('float32').mask(df[column] == 0)
+    return compact.encode_frame(df.reset_index(drop=True))
+
+def peak_rss_mb(): #Peak resident memory of this process so far, in MB (None where the resource module is unavailable).
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024 #Bytes on macOS, kilobytes on Linux.
+
+def read_csv_chunked(source, chunksize=CHUNK_SIZE): #Streams a CSV (URL or local path) and returns the cleaned frame plus ingestion stats.
+    start = time.perf_counter()
+    handle = urlopen(source) if str(source).startswith(("http://", "https://")) else source #A response object is read incrementally, a URL given to pandas is buffered whole.
+    rows_read = 0
+    chunks = []
+    try:
+        with pd.read_csv(handle, usecols=COLUMNS, dtype=DTYPES, chunksize=chunksize) as reader:
+            for chunk in reader:
+                rows_read += len(chunk)
+                chunks.append(clean_data(chunk))
+    finally:
+        if handle is not source:
+            handle.close()
+    df = compact.concat_encoded(chunks) if chunks else clean_data(pd.DataFrame(columns=COLUMNS))
+    seconds = time.perf_counter() - start
+    stats = {
+        "rows_read": rows_read,
+        "rows_kept": len(df),
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows_read / seconds) if seconds else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1) if resource else None,
+        "frame_mb": round(df.memory_usage(deep=True).sum() / 1024 ** 2, 1),
+    }
+    return df, stats
+
+def main(): #Measures ingestion of a CSV without touching the snapshot, e.g. to size containers: python ingest.py nyc.csv
+    parser = argparse.ArgumentParser(description="Stream the inspection CSV and report throughput and peak memory.")
+    parser.add_argument("source", help="Open Data URL or local CSV file.")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    _, stats = read_csv_chunked(args.source, args.chunksize)
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#Trigram index over the distinct restaurant names (DBA), built once per dataset version.
+#A lookup first narrows the few tens of thousands of distinct names down to candidates through the trigram postings,
+#checks only those candidates, and then reads their rows from per-name row lists that are already sorted by recency.
+#Row ids are positions in the frame the index was built from (use df.iloc).
+
+import numpy as np
+
+TYPEAHEAD_PAGE_SIZE = 20 #Names sent to the browser per type-ahead page.
+
+def trigrams(text): #Overlapping 3-character pieces of a lower-cased string, e.g. 'pizza' -> {'piz', 'izz', 'zza'}.
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def edit_distance(a, b, max_distance): #Levenshtein distance, giving up early (returns max_distance + 1) once it cannot stay within max_distance.
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+class NameIndex:
+    SHARED = ('rank', 'rows', 'offsets') #Per-row arrays that shared_dataset.publish() writes once for every process on the host.
+
+    def __init__(self, df, shared=None):
+        self.names = np.asarray(df['DBA'].cat.categories, dtype=object) #Distinct names; a name id is its category code.
+        self.lower_names = np.array([name.lower() for name in self.names], dtype=object)
+
+        if shared: #Mapped read-only from the shared dataset instead of being built again.
+            self.rank, self.rows, self.offsets = (shared[name] for name in self.SHARED)
+        else: #Rows grouped by name id, most recent inspection first inside each group.
+            dates = df['INSPECTION DATE'].to_numpy()
+            codes = df['DBA'].cat.codes.to_numpy()
+            by_recency = np.argsort(dates, kind='stable')[::-1]
+            self.rank = np.empty(len(df), dtype=np.int64) #rank[row] = position of the row when all rows are sorted by recency.
+            self.rank[by_recency] = np.arange(len(df))
+            self.rows = by_recency[np.argsort(codes[by_recency], kind='stable')]
+            self.offsets = np.concatenate([[0], np.cumsum(np.bincount(codes[codes >= 0], minlength=len(self.names)))])
+            self.rows = self.rows[len(self.rows) - self.offsets[-1]:] #Rows without a name (code -1) sort first and are dropped.
+
+        #Trigram -> sorted array of name ids containing it.
+        postings = {}
+        for name_id, name in enumerate(self.lower_names):
+            for gram in trigrams(name):
+                postings.setdefault(gram, []).append(name_id)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+        #Sorted lower-case names for prefix lookups with a binary search.
+        self.sorted_ids = np.argsort(self.lower_names, kind='stable')
+        self.sorted_lower = self.lower_names[self.sorted_ids]
+        self.alphabetical_rank = np.empty(len(self.names), dtype=np.int64) #Position of every name id in sorted order.
+        self.alphabetical_rank[self.sorted_ids] = np.arange(len(self.names))
+
+    def substring(self, text): #Name ids whose name contains text (case-insensitive), like str.contains(text, case=False, regex=False).
+        text = text.lower()
+        if len(text) < 3: #Too short for a trigram, check every distinct name (still far fewer than rows).
+            return np.array([i for i, name in enumerate(self.lower_names) if text in name], dtype=np.int32)
+        candidates = None
+        for gram in sorted(trigrams(text), key=lambda gram: len(self.postings.get(gram, ()))): #Rarest trigram first keeps the intersections small.
+            ids = self.postings.get(gram)
+            if ids is None:
+                return np.array([], dtype=np.int32)
+            candidates = ids if candidates is None else np.intersect1d(candidates, ids, assume_unique=True)
+        return np.array([i for i in candidates if text in self.lower_names[i]], dtype=np.int32) #Trigrams can match out of order.
+
+    def prefix(self, text): #Name ids whose name starts with text (case-insensitive), found with two binary searches.
+        text = text.lower()
+        start = np.searchsorted(self.sorted_lower, text, side='left')
+        end = np.searchsorted(self.sorted_lower, text + '\uffff', side='left')
+        return self.sorted_ids[start:end]
+
+    def fuzzy(self, text, max_distance=2): #Name ids within max_distance edits of text, for typos such as 'Starbuks'.
+        text = text.lower()
+        grams = trigrams(text)
+        lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not lists:
+            return np.array([], dtype=np.int32)
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.names))
+        needed = max(1, len(grams) - 3 * max_distance) #Each edit destroys at most 3 trigrams, so closer names share at least this many.
+        candidates = np.flatnonzero(shared >= needed)
+        return np.array([i for i in candidates if edit_distance(text, self.lower_names[i], max_distance) <= max_distance], dtype=np.int32)
+
+    def rows_for(self, name_ids, limit=None): #Rows of the given names, most recent first, touching only those names' row lists.
+        if len(name_ids) == 0:
+            return np.array([], dtype=np.int64)
+        parts = [self.rows[self.offsets[i]:self.offsets[i + 1]] for i in name_ids]
+        if limit is not None:
+            parts = [part[:limit] for part in parts] #Each list is sorted by recency, so only its head can reach the overall top.
+        rows = np.concatenate(parts)
+        ranks = self.rank[rows]
+        if limit is not None and len(rows) > limit:
+            keep = np.argpartition(ranks, limit)[:limit]
+            rows, ranks = rows[keep], ranks[keep]
+        return rows[np.argsort(ranks, kind='stable')]
+
+    def typeahead(self, text, page=0, page_size=TYPEAHEAD_PAGE_SIZE): #One page of ranked name suggestions and the total number of matches.
+        #Ranking: exact name, then names starting with the text, then a word starting with it, then any other substring;
+        #alphabetical within each group. Texts shorter than 3 characters only use the prefix search, which is two binary searches.
+        text = text.strip().lower()
+        if not text:
+            return [], 0
+        prefix_ids = self.prefix(text)
+        if len(text) < 3:
+            ids = prefix_ids
+            tiers = np.where(self.lower_names[ids] == text, 0, 1)
+        else:
+            ids = np.union1d(prefix_ids, self.substring(text))
+            lower = self.lower_names[ids]
+            tiers = np.array([0 if name == text else 1 if name.startswith(text) else 2 if f" {text}" in name else 3 for name in lower])
+        ranked = ids[np.lexsort((self.alphabetical_rank[ids], tiers))]
+        return list(self.names[ranked[page * page_size:(page + 1) * page_size]]), len(ranked)
+
+    def search(self, text, limit=None): #Substring match, falling back to typo-tolerant matching when nothing contains the text.
+        name_ids = self.substring(text)
+        if len(name_ids) == 0 and len(text) >= 3:
+            name_ids = self.fuzzy(text)
+        return self.rows_for(name_ids, limit)
@@ -0,0 +1,125 @@
+#Pluggable query backends for the app's filters, top-k lists and counts.
+#  PandasBackend: answers from the resident, dictionary-encoded frame through the indexes and the aggregate cube.
+#  DuckDBBackend: pushes the same queries down to an embedded DuckDB engine that scans the memory-mapped snapshot
+#                 files in place (no server, no copy of the data in Python), using all cores for each query.
+#Pick one with NYC_INSPECTOR_BACKEND=pandas|duckdb (default pandas).
+#The app still loads the frame with either backend: the widget options, type-ahead, map, trends and keyword search read
+#it directly. DuckDB moves the filter / top-k / count queries off the frame; it does not lower the memory per process.
+
+import os
+import threading
+
+import compact
+import data_store
+from cube import DIMENSIONS, rollup
+
+BACKEND = os.environ.get("NYC_INSPECTOR_BACKEND", "pandas")
+CRITICAL_FILTERS = ("Critical", "Not Critical") #Critical flag choices that filter; "All" or None keeps every row.
+
+class QueryBackend: #Interface shared by the backends. Every method returns a small pandas DataFrame.
+    def search(self, name=None, zip_code=None, limit=20): #Most recent rows whose DBA contains name (typo tolerant) in an optional ZIP code.
+        raise NotImplementedError
+
+    def top_by_score(self, cuisine=None, grade=None, critical=None, limit=20): #Lowest-score rows for the selection; falsy or "All" means no filter.
+        raise NotImplementedError
+
+    def counts(self, column, limit=None): #Rows per value of column, most frequent first, as columns [column, 'rows'].
+        raise NotImplementedError
+
+class PandasBackend(QueryBackend):
+    def __init__(self, dataset):
+        self.dataset = dataset
+
+    def search(self, name=None, zip_code=None, limit=20):
+        df = self.dataset.df
+        if zip_code and not name: #The ZIP code's rows straight from the spatial index, already newest first.
+            return df.iloc[self.dataset.spatial_index.zip_rows(zip_code, limit)]
+        if name: #Only the matching names' rows are read, already sorted newest first.
+            df = df.iloc[self.dataset.name_index.search(name, limit=None if zip_code else limit)]
+        if zip_code:
+            df = df[df['ZIPCODE'].eq(zip_code).fillna(False)] #Rows without a ZIP code never match.
+        if not name:
+            df = df.sort_values(by='INSPECTION DATE', ascending=False)
+        return df.head(limit)
+
+    def top_by_score(self, cuisine=None, grade=None, critical=None, limit=20):
+        return self.dataset.df.iloc[self.dataset.facet_index.top_k(cuisine, grade, critical, k=limit)]
+
+    def counts(self, column, limit=None):
+        if column in DIMENSIONS: #Cube roll-up, no pass over the rows.
+            result = rollup(self.dataset.cube, [column])[[column, 'rows']].sort_values('rows', ascending=False)
+        else:
+            result = compact.code_counts(self.dataset.df[column]).rename('rows').rename_axis(column).reset_index()
+        return result.head(limit) if limit else result
+
+class DuckDBBackend(QueryBackend):
+    def __init__(self, snapshot_dir=data_store.SNAPSHOT_DIR):
+        import duckdb #Optional dependency, only needed for this backend.
+        from pyarrow import feather
+
+        manifest = data_store.read_manifest(snapshot_dir)
+        if manifest is None:
+            raise RuntimeError("No snapshot found. Build one first with: python data_store.py")
+        self.connection = duckdb.connect() #In-memory database; the data stays in the snapshot files.
+        self.tables = [feather.read_table(os.path.join(snapshot_dir, file_name), memory_map=True) for file_name in manifest["files"]]
+        self.local = threading.local() #Streamlit serves sessions from several threads; each thread queries through its own cursor.
+
+    def cursor(self): #This thread's cursor. Registered tables and temp views are per cursor, so every cursor sets up its own.
+        cursor = getattr(self.local, "cursor", None)
+        if cursor is None:
+            cursor = self.connection.cursor()
+            segments = []
+            for position, table in enumerate(self.tables):
+                cursor.register(f"segment_{position}", table) #Zero-copy, every cursor scans the same mapped Arrow buffers.
+                segments.append(f"SELECT *, {position} AS segment FROM segment_{position}")
+            if len(segments) == 1:
+                cursor.execute("CREATE TEMP VIEW inspections AS SELECT * FROM segment_0")
+            else: #Same merge rule as data_store.merge_segments(): a later segment replaces earlier rows with the same key.
+                cursor.execute(f"""
+                    CREATE TEMP VIEW inspections AS
+                    SELECT * EXCLUDE (segment) FROM ({' UNION ALL BY NAME '.join(segments)})
+                    QUALIFY segment = max(segment) OVER (PARTITION BY CAMIS, "INSPECTION DATE", "VIOLATION DESCRIPTION")
+                """)
+            self.local.cursor = cursor
+        return cursor
+
+    def query(self, sql, parameters=()):
+        return self.cursor().execute(sql, list(parameters)).df()
+
+    def search(self, name=None, zip_code=None, limit=20):
+        conditions, parameters = [], []
+        if zip_code:
+            conditions.append("ZIPCODE = ?")
+            parameters.append(int(zip_code))
+        if name:
+            results = self.query(self.search_sql(conditions + ["contains(lower(DBA), lower(?))"]), parameters + [name, limit])
+            if not results.empty or len(name) < 3:
+                return results
+            conditions.append("levenshtein(lower(DBA), lower(?)) <= 2") #Typo-tolerant fallback, like NameIndex.search().
+            parameters.append(name)
+        return self.query(self.search_sql(conditions), parameters + [limit])
+
+    def search_sql(self, conditions):
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return f'SELECT * FROM inspections {where} ORDER BY "INSPECTION DATE" DESC LIMIT ?'
+
+    def top_by_score(self, cuisine=None, grade=None, critical=None, limit=20):
+        conditions, parameters = [], []
+        for column, value in (("CUISINE DESCRIPTION", cuisine), ("GRADE", grade),
+                              ("CRITICAL FLAG", critical if critical in CRITICAL_FILTERS else None)):
+            if value:
+                conditions.append(f'"{column}" = ?')
+                parameters.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.query(f"SELECT * FROM inspections {where} ORDER BY SCORE NULLS LAST LIMIT ?", parameters + [limit])
+
+    def counts(self, column, limit=None):
+        sql = f'SELECT "{column}", count(*) AS rows FROM inspections WHERE "{column}" IS NOT NULL GROUP BY 1 ORDER BY rows DESC'
+        return self.query(sql + (" LIMIT ?" if limit else ""), [limit] if limit else [])
+
+def create_backend(dataset, name=BACKEND): #Backend by name; the pandas one wraps the already loaded Dataset.
+    if name == "duckdb":
+        return DuckDBBackend()
+    if name == "pandas":
+        return PandasBackend(dataset)
+    raise ValueError(f"Unknown query backend '{name}', expected 'pandas' or 'duckdb'.")
@@ -0,0 +1,106 @@
+#Incremental refresh of the local snapshot (see data_store.py).
+#Only rows inspected on or after the snapshot watermark are fetched, cleaned and saved as a small delta segment,
+#so a daily refresh costs time proportional to the new rows instead of the whole inspection history.
+#Run it from a scheduler, e.g. once a day: python refresh.py
+
+import argparse
+import os
+from urllib.parse import urlencode
+
+import pandas as pd
+
+import cube
+import data_store
+import ingest
+
+DELTA_URL = "https://data.cityofnewyork.us/resource/43nn-pn8j.csv" #Socrata (SODA) endpoint of the same dataset, supports server-side filtering.
+DELTA_SOURCE = os.environ.get("NYC_INSPECTOR_DELTA_SOURCE", DELTA_URL) #A local CSV/Feather/Parquet delta file can stand in for the endpoint.
+PAGE_SIZE = 50000 #Rows per SODA request.
+MAX_SEGMENTS = 30 #Once this many segments pile up they are compacted back into a single base file.
+
+SODA_DTYPES = {column.lower().replace(' ', '_'): dtype for column, dtype in ingest.DTYPES.items()} #ingest.DTYPES under the SODA names.
+
+def normalize_columns(df): #SODA returns lower_snake_case names (e.g. 'inspection_date'), the CSV export uses 'INSPECTION DATE'.
+    names = {column.lower().replace(' ', '_'): column for column in ingest.COLUMNS}
+    return df.rename(columns=lambda column: names.get(column, column))
+
+def fetch_remote_delta(url, watermark): #Pages through the SODA endpoint, asking only for rows on or after the watermark date.
+    pages = []
+    offset = 0
+    while True:
+        query = urlencode({
+            "$where": f"inspection_date >= '{watermark:%Y-%m-%dT00:00:00}'",
+            "$order": ":id",
+            "$limit": PAGE_SIZE,
+            "$offset": offset,
+        })
+        page = pd.read_csv(f"{url}?{query}", dtype=SODA_DTYPES) #Typed like the snapshot, so unchanged rows hash equal in new_rows().
+        pages.append(page)
+        if len(page) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+    return pd.concat(pages, ignore_index=True)
+
+def fetch_delta(source, watermark): #Returns the raw (uncleaned) rows inspected on or after the watermark date.
+    if data_store.is_remote(source):
+        df = fetch_remote_delta(source, watermark)
+    else:
+        df = data_store.read_source(source)
+    df = normalize_columns(df)
+    df['INSPECTION DATE'] = pd.to_datetime(df['INSPECTION DATE'], errors='coerce') #SODA sends ISO timestamps, the CSV export MM/DD/YYYY.
+    return df[df['INSPECTION DATE'] >= watermark.normalize()] #Rows from the watermark day itself are re-read, later ones replace them by ROW_KEY.
+
+def compact_snapshot(snapshot_dir=data_store.SNAPSHOT_DIR): #Folds the base file and all delta segments into a single new base file.
+    manifest = data_store.read_manifest(snapshot_dir)
+    df = data_store.load_snapshot(snapshot_dir)
+    version = data_store.save_snapshot(df, manifest["source"], snapshot_dir)
+    carried = cube.load_cube(manifest["version"], snapshot_dir) #Compaction does not change the data, so the cube carries over as is.
+    cube.save_cube(carried if carried is not None else cube.build_cube(df), version, snapshot_dir)
+    return version
+
+def new_rows(delta, snapshot_dir=data_store.SNAPSHOT_DIR): #Drops delta rows already stored unchanged under their ROW_KEY (the re-read watermark day).
+    if delta.empty:
+        return delta
+    stored = data_store.load_rows_since(delta['INSPECTION DATE'].min(), snapshot_dir)
+    #Whole-row hashes; categoricals hash by value, so differing category lists do not matter. Equal rows also share their ROW_KEY.
+    unchanged = pd.util.hash_pandas_object(delta, index=False).isin(pd.util.hash_pandas_object(stored, index=False))
+    return delta[~unchanged.to_numpy()].reset_index(drop=True)
+
+def apply_delta(raw_delta, snapshot_dir=data_store.SNAPSHOT_DIR): #Cleans a raw delta, stores it as a new segment and returns the new dataset version.
+    manifest = data_store.read_manifest(snapshot_dir)
+    if manifest is None or manifest.get("schema_version") != data_store.SCHEMA_VERSION:
+        raise RuntimeError("No up-to-date snapshot to refresh. Build one first with: python data_store.py")
+    delta = new_rows(ingest.clean_data(raw_delta), snapshot_dir)
+    if delta.empty: #Nothing new, keep the version so that downstream caches stay warm.
+        return manifest["version"]
+    file_name = data_store.write_segment(delta, manifest["version"] + 1, snapshot_dir)
+    watermark = max(pd.Timestamp(manifest["watermark"]), delta['INSPECTION DATE'].max()) if manifest["watermark"] else delta['INSPECTION DATE'].max()
+    version = data_store.commit_segments(manifest["files"] + [file_name], manifest["rows"] + len(delta), watermark, manifest["source"], snapshot_dir)
+    cube.refresh_cube(manifest["version"], version, delta['INSPECTION DATE'].min(), snapshot_dir) #Re-aggregates only the months the delta touches.
+    if len(manifest["files"]) + 1 > MAX_SEGMENTS:
+        version = compact_snapshot(snapshot_dir)
+    return version
+
+def refresh(source=DELTA_SOURCE, snapshot_dir=data_store.SNAPSHOT_DIR, offline=data_store.OFFLINE): #Fetches and applies everything newer than the current watermark.
+    if offline and data_store.is_remote(source):
+        raise RuntimeError(f"Offline mode is on but the delta source is a URL ({source}). Set NYC_INSPECTOR_DELTA_SOURCE to a local file.")
+    manifest = data_store.read_manifest(snapshot_dir)
+    if manifest is None or not manifest.get("watermark"):
+        raise RuntimeError("No snapshot to refresh. Build one first with: python data_store.py")
+    raw_delta = fetch_delta(source, pd.Timestamp(manifest["watermark"]))
+    return apply_delta(raw_delta, snapshot_dir), len(raw_delta)
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply new inspection rows to the local snapshot.")
+    parser.add_argument("--source", default=DELTA_SOURCE, help="SODA endpoint or local delta file.")
+    parser.add_argument("--snapshot-dir", default=data_store.SNAPSHOT_DIR)
+    parser.add_argument("--offline", action="store_true", default=data_store.OFFLINE, help="Refuse to download from a URL.")
+    parser.add_argument("--compact", action="store_true", help="Fold all delta segments into one base file afterwards.")
+    args = parser.parse_args()
+    version, rows = refresh(args.source, args.snapshot_dir, args.offline)
+    if args.compact:
+        version = compact_snapshot(args.snapshot_dir)
+    print(f"Fetched {rows} rows, dataset is now at version {version}")
+
+if __name__ == "__main__":
+    main()
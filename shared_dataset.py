@@ -0,0 +1,152 @@
+#Shared, read-only dataset for several Streamlit processes on one host.
+#One loader process publishes the cleaned, dictionary-encoded frame as plain .npy column files:
+#  <shared dir>/v<version>/<column position>.codes.npy / .values.npy / .mask.npy  +  meta.json (names, dtypes, category lists)
+#together with the large arrays of the indexes (see the SHARED attribute of each index class):
+#  <shared dir>/v<version>/<index>.<attribute>.npy, e.g. name_index.rows.npy, model.inspections.0.values.npy
+#Every app process memory-maps those files read-only and wraps them in a DataFrame / the indexes without copying, so all
+#processes share the same physical pages through the OS page cache. Per-row and per-inspection data is therefore held once
+#per host; each added worker only builds the structures that grow with the distinct names and restaurants (name strings
+#and trigrams, the restaurant table, ZIP lookups), not with the inspection history.
+#A refresh publishes a new version folder and then flips the CURRENT pointer; app processes pick it up on their next rerun.
+#Loader: python shared_dataset.py --watch 300        App: NYC_INSPECTOR_SHARED_DIR=shared streamlit run app_v3.py
+
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+import data_store
+from dataset import Dataset
+
+SHARED_DIR = os.environ.get("NYC_INSPECTOR_SHARED_DIR") #Shared mode is on when this is set.
+KEEP_VERSIONS = 2 #Older version folders are deleted; processes still mapping them keep working on Linux/macOS.
+INDEXES = ['name_index', 'facet_index', 'model', 'history', 'spatial_index', 'violation_index'] #Dataset properties whose SHARED arrays are published.
+
+def version_dir(version, shared_dir=SHARED_DIR):
+    return os.path.join(shared_dir, f"v{version}")
+
+def current_version(shared_dir=SHARED_DIR): #Version the CURRENT pointer names, 0 when nothing was published yet.
+    path = os.path.join(shared_dir, "CURRENT")
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        return int(f.read().strip())
+
+def write_columns(df, folder, prefix=""): #Saves every column of df as raw arrays and returns their descriptions for meta.json.
+    columns = []
+    for column in df.columns:
+        series = df[column]
+        file_stem = os.path.join(folder, f"{prefix}{len(columns)}")
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            np.save(file_stem + ".codes.npy", series.cat.codes.to_numpy())
+            columns.append({"name": column, "kind": "category", "categories": [str(value) for value in series.cat.categories]})
+        elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype): #Nullable integers: values plus missing-value mask.
+            np.save(file_stem + ".values.npy", series.array.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0))
+            np.save(file_stem + ".mask.npy", series.isna().to_numpy())
+            columns.append({"name": column, "kind": "nullable", "dtype": str(series.dtype)})
+        else:
+            np.save(file_stem + ".values.npy", series.to_numpy())
+            columns.append({"name": column, "kind": "numpy"})
+    return columns
+
+def publish(df, version, shared_dir=SHARED_DIR): #Writes every column and the index arrays, then atomically points CURRENT at the new version.
+    tmp_dir = version_dir(version, shared_dir) + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    meta = {"version": version, "rows": len(df), "columns": write_columns(df, tmp_dir), "indexes": {}}
+    dataset = Dataset(df, version) #Built once here, for every process on the host.
+    for index_name in INDEXES:
+        index = getattr(dataset, index_name)
+        meta["indexes"][index_name] = {}
+        for attribute in type(index).SHARED:
+            value = getattr(index, attribute)
+            file_stem = f"{index_name}.{attribute}"
+            if isinstance(value, pd.DataFrame):
+                meta["indexes"][index_name][attribute] = write_columns(value, tmp_dir, file_stem + ".")
+            else:
+                np.save(os.path.join(tmp_dir, file_stem + ".npy"), value)
+                meta["indexes"][index_name][attribute] = None #A plain array.
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    shutil.rmtree(version_dir(version, shared_dir), ignore_errors=True)
+    os.replace(tmp_dir, version_dir(version, shared_dir))
+
+    pointer = os.path.join(shared_dir, "CURRENT")
+    with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+        f.write(str(version))
+    os.replace(pointer + ".tmp", pointer)
+
+    published = sorted(int(name[1:]) for name in os.listdir(shared_dir) if name.startswith("v") and name[1:].isdigit())
+    for old_version in published[:-KEEP_VERSIONS]:
+        shutil.rmtree(version_dir(old_version, shared_dir), ignore_errors=True) #Best effort, Windows keeps mapped files locked.
+
+def map_array(path): #Plain read-only ndarray view over the memory-mapped file, no copy.
+    return np.asarray(np.load(path, mmap_mode="r"))
+
+def read_meta(version=None, shared_dir=SHARED_DIR): #Folder and meta.json of a published version (default: CURRENT).
+    version = version or current_version(shared_dir)
+    folder = version_dir(version, shared_dir)
+    if not version or not os.path.exists(os.path.join(folder, "meta.json")):
+        raise RuntimeError(f"No shared dataset published in {shared_dir} yet. Publish one first with: python shared_dataset.py --shared-dir {shared_dir}")
+    with open(os.path.join(folder, "meta.json"), encoding="utf-8") as f:
+        return folder, json.load(f)
+
+def read_columns(specs, folder, prefix=""): #Zero-copy, read-only DataFrame over columns saved by write_columns().
+    columns = {}
+    for position, spec in enumerate(specs):
+        file_stem = os.path.join(folder, f"{prefix}{position}")
+        if spec["kind"] == "category":
+            codes = map_array(file_stem + ".codes.npy")
+            values = pd.Categorical.from_codes(codes, categories=spec["categories"], validate=False)
+        elif spec["kind"] == "nullable":
+            array_type = pd.api.types.pandas_dtype(spec["dtype"]).construct_array_type()
+            values = array_type(map_array(file_stem + ".values.npy"), map_array(file_stem + ".mask.npy"), copy=False)
+        else:
+            values = map_array(file_stem + ".values.npy")
+        columns[spec["name"]] = pd.Series(values, copy=False)
+    return pd.DataFrame(columns, copy=False)
+
+def attach(version=None, shared_dir=SHARED_DIR): #Zero-copy, read-only DataFrame over a published version (default: CURRENT).
+    folder, meta = read_meta(version, shared_dir)
+    return read_columns(meta["columns"], folder)
+
+def attach_indexes(version=None, shared_dir=SHARED_DIR): #Index name -> {attribute: mapped array or frame}, for Dataset(shared=...).
+    folder, meta = read_meta(version, shared_dir)
+    indexes = {}
+    for index_name, attributes in meta.get("indexes", {}).items(): #Versions published before the indexes were shared have none.
+        indexes[index_name] = {
+            attribute: map_array(os.path.join(folder, f"{index_name}.{attribute}.npy")) if specs is None
+            else read_columns(specs, folder, f"{index_name}.{attribute}.")
+            for attribute, specs in attributes.items()
+        }
+    return indexes
+
+def publish_snapshot(shared_dir=SHARED_DIR, snapshot_dir=data_store.SNAPSHOT_DIR): #Publishes the current snapshot if it is newer than what is shared.
+    version = data_store.dataset_version(snapshot_dir)
+    if version and version == current_version(shared_dir):
+        return version
+    df = data_store.load_dataset(snapshot_dir=snapshot_dir)
+    version = data_store.dataset_version(snapshot_dir) #Loading may have built the first snapshot.
+    publish(df, version, shared_dir)
+    return version
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish the dataset for zero-copy sharing between app processes.")
+    parser.add_argument("--shared-dir", default=SHARED_DIR or "shared")
+    parser.add_argument("--snapshot-dir", default=data_store.SNAPSHOT_DIR)
+    parser.add_argument("--watch", type=int, default=0, help="Keep running and republish after refreshes, checking every N seconds.")
+    args = parser.parse_args()
+    os.makedirs(args.shared_dir, exist_ok=True)
+    while True:
+        version = publish_snapshot(args.shared_dir, args.snapshot_dir)
+        print(f"Shared dataset version {version} in {args.shared_dir}")
+        if not args.watch:
+            break
+        time.sleep(args.watch)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#Location lookups for the search tab and the map, built once per dataset version.
+#Restaurants (one point each, located by their latest inspection) are bucketed into square grid cells of CELL_METRES on a
+#local flat projection of NYC and sorted by cell, so each grid column of a query rectangle is one contiguous slice found
+#with two binary searches. Radius and bounding-box queries only measure the restaurants in the touched cells.
+#ZIP codes map to their frame rows (newest first), their restaurants and their neighbouring ZIP codes; boroughs to their ZIP codes.
+#Restaurant ids are positions in InspectionModel.restaurants / .latest, row ids are positions in the frame (use df.iloc).
+
+import numpy as np
+import pandas as pd
+
+CELL_METRES = 250
+METRES_PER_DEGREE = 111320 #North-south; east-west degrees are shorter by cos(latitude).
+REFERENCE_LATITUDE = 40.7 #Middle of NYC, the flat projection is accurate to well under 1% across the five boroughs.
+KEY_OFFSET = 2 ** 31 #Packs (cell column, cell row) into one sortable int64: column * 2**32 + row + KEY_OFFSET.
+
+def project(latitude, longitude): #Degrees to metres east and north on the local flat projection.
+    x = np.asarray(longitude, dtype=np.float64) * METRES_PER_DEGREE * np.cos(np.radians(REFERENCE_LATITUDE))
+    y = np.asarray(latitude, dtype=np.float64) * METRES_PER_DEGREE
+    return x, y
+
+def cell_key(cell_x, cell_y):
+    return np.asarray(cell_x, dtype=np.int64) * 2 ** 32 + np.asarray(cell_y, dtype=np.int64) + KEY_OFFSET
+
+class SpatialIndex:
+    SHARED = ('zip_order',) #Per-row array that shared_dataset.publish() writes once for every process on the host.
+
+    def __init__(self, df, restaurants, shared=None):
+        #Grid over the restaurants that have coordinates.
+        latitude = restaurants['Latitude'].to_numpy(dtype='float64', na_value=np.nan)
+        longitude = restaurants['Longitude'].to_numpy(dtype='float64', na_value=np.nan)
+        located = np.flatnonzero(~np.isnan(latitude) & ~np.isnan(longitude))
+        x, y = project(latitude[located], longitude[located])
+        keys = cell_key(np.floor(x / CELL_METRES), np.floor(y / CELL_METRES))
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.ids = located[order]
+        self.x = x[order]
+        self.y = y[order]
+        self.latitude = latitude
+        self.longitude = longitude
+
+        #ZIP code -> (start, end) of its rows in self.zip_order, sorted by ZIP code and then newest first.
+        zip_codes = df['ZIPCODE'].to_numpy(dtype='int64', na_value=-1)
+        if shared: #Mapped read-only from the shared dataset instead of being sorted again.
+            self.zip_order = shared['zip_order']
+        else:
+            dates = df['INSPECTION DATE'].to_numpy().astype(np.int64)
+            self.zip_order = np.lexsort((np.arange(len(df)), -dates, zip_codes))
+        sorted_zips = zip_codes[self.zip_order]
+        starts = np.flatnonzero(np.diff(sorted_zips)) + 1
+        starts = np.concatenate([[0], starts]) if len(df) else starts
+        ends = np.append(starts[1:], len(df))
+        self.zip_slices = {int(sorted_zips[start]): (start, end) for start, end in zip(starts, ends) if sorted_zips[start] >= 0}
+
+        restaurant_zips = restaurants['ZIPCODE'].to_numpy(dtype='int64', na_value=-1)
+        self.zip_restaurants = {int(zip_code): ids for zip_code, ids in pd.Series(restaurant_zips).groupby(restaurant_zips).indices.items() if zip_code >= 0}
+        has_zip = restaurant_zips >= 0
+        self.borough_zips = {borough: sorted(int(zip_code) for zip_code in zips) for borough, zips in
+                             pd.Series(restaurant_zips[has_zip]).groupby(restaurants['BORO'].to_numpy()[has_zip]).unique().items()}
+
+        #Two ZIP codes are neighbours when some of their restaurants sit in the same or adjacent grid cells.
+        cells = pd.DataFrame({'key': self.keys, 'zip': restaurant_zips[self.ids]})
+        cells = cells[cells['zip'] >= 0].drop_duplicates()
+        pairs = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                shifted = cells.assign(key=cells['key'] + dx * 2 ** 32 + dy)
+                pairs.append(cells.merge(shifted, on='key', suffixes=('', '_neighbour'))[['zip', 'zip_neighbour']])
+        pairs = pd.concat(pairs).drop_duplicates()
+        pairs = pairs[pairs['zip'] != pairs['zip_neighbour']]
+        self.zip_neighbours = {int(zip_code): sorted(int(neighbour) for neighbour in neighbours) for zip_code, neighbours in pairs.groupby('zip')['zip_neighbour']}
+
+    def candidates(self, x0, y0, x1, y1): #Positions (in self.keys) of the points in every cell overlapping the rectangle, in metres.
+        row0, row1 = int(np.floor(y0 / CELL_METRES)), int(np.floor(y1 / CELL_METRES))
+        columns = np.arange(int(np.floor(x0 / CELL_METRES)), int(np.floor(x1 / CELL_METRES)) + 1)
+        if len(columns) == 0 or row1 < row0:
+            return np.array([], dtype=np.int64)
+        starts = np.searchsorted(self.keys, cell_key(columns, row0), side='left')
+        ends = np.searchsorted(self.keys, cell_key(columns, row1), side='right')
+        return np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)])
+
+    def within(self, latitude, longitude, metres, limit=None): #Restaurant ids within the radius and their distances in metres, nearest first.
+        x, y = project(latitude, longitude)
+        positions = self.candidates(x - metres, y - metres, x + metres, y + metres)
+        distances = np.hypot(self.x[positions] - x, self.y[positions] - y)
+        inside = distances <= metres
+        positions, distances = positions[inside], distances[inside]
+        order = np.argsort(distances, kind='stable')[:limit]
+        return self.ids[positions[order]], distances[order]
+
+    def bbox(self, south, west, north, east): #Restaurant ids inside a map viewport.
+        x0, y0 = project(south, west)
+        x1, y1 = project(north, east)
+        positions = self.candidates(x0, y0, x1, y1)
+        ids = self.ids[positions]
+        inside = (self.latitude[ids] >= south) & (self.latitude[ids] <= north) & (self.longitude[ids] >= west) & (self.longitude[ids] <= east)
+        return np.sort(ids[inside])
+
+    def zip_rows(self, zip_code, limit=None): #Frame rows with this ZIP code, newest first, without scanning the frame.
+        start, end = self.zip_slices.get(int(zip_code), (0, 0))
+        return self.zip_order[start:end][:limit]
+
+    def zip_centre(self, zip_code): #Mean location of the ZIP code's restaurants, or None when none of them is located.
+        ids = self.zip_restaurants.get(int(zip_code), [])
+        latitude, longitude = self.latitude[ids], self.longitude[ids]
+        located = ~np.isnan(latitude) & ~np.isnan(longitude)
+        if not located.any():
+            return None
+        return float(latitude[located].mean()), float(longitude[located].mean())
+
+    def neighbouring_zips(self, zip_code):
+        return self.zip_neighbours.get(int(zip_code), [])
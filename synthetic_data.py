@@ -0,0 +1,223 @@
+#Synthetic NYC inspection data for offline benchmarks and regression checks.
+#Writes a CSV with the same 27 columns and value formats as the Open Data export, with realistic distributions:
+#chains and one-off restaurant names, borough weights, ZIP codes and coordinates inside each borough, a long-tailed
+#cuisine mix, several inspections per restaurant, violation rows per inspection, scores summed from violation points and
+#grades only where the real grading rules give one. Scale 1 is about the size of the live dataset (~287K rows).
+#Rows are generated and appended restaurant chunk by restaurant chunk, so 100x never has to fit in memory.
+#Usage: python synthetic_data.py --scale 10 --out synthetic_10x.csv
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+ROWS_PER_SCALE = 287000 #Rows of the live dataset, see README.
+RESTAURANTS_PER_SCALE = 30000
+RESTAURANTS_PER_CHUNK = 20000
+FIRST_DATE = pd.Timestamp("2016-01-01")
+RECORD_DATE = pd.Timestamp("2025-05-28")
+
+RAW_COLUMNS = ['CAMIS', 'DBA', 'BORO', 'BUILDING', 'STREET', 'ZIPCODE', 'PHONE', 'CUISINE DESCRIPTION', 'INSPECTION DATE',
+               'ACTION', 'VIOLATION CODE', 'VIOLATION DESCRIPTION', 'CRITICAL FLAG', 'SCORE', 'GRADE', 'GRADE DATE',
+               'RECORD DATE', 'INSPECTION TYPE', 'Latitude', 'Longitude', 'Community Board', 'Council District',
+               'Census Tract', 'BIN', 'BBL', 'NTA', 'Location']
+
+BOROUGHS = { #Share of restaurants, ZIP codes, (south, west, north, east) and BBL borough digit.
+    'Manhattan': (0.38, list(range(10001, 10041)) + [10065, 10075, 10128, 10280, 10282], (40.70, -74.02, 40.88, -73.91), 1),
+    'Brooklyn': (0.26, list(range(11201, 11240)), (40.57, -74.04, 40.74, -73.83), 3),
+    'Queens': (0.23, list(range(11101, 11110)) + list(range(11354, 11379)) + list(range(11411, 11436)), (40.54, -73.96, 40.80, -73.70), 4),
+    'Bronx': (0.09, list(range(10451, 10476)), (40.79, -73.93, 40.92, -73.75), 2),
+    'Staten Island': (0.04, list(range(10301, 10315)), (40.50, -74.25, 40.65, -74.05), 5),
+}
+CUISINES = { #Share of restaurants; the rest is spread over LONG_TAIL_CUISINES.
+    'American': 0.20, 'Chinese': 0.10, 'Coffee/Tea': 0.08, 'Pizza': 0.07, 'Italian': 0.05, 'Mexican': 0.05,
+    'Latin American': 0.04, 'Bakery Products/Desserts': 0.04, 'Caribbean': 0.04, 'Japanese': 0.04, 'Chicken': 0.03,
+    'Spanish': 0.02, 'Donuts': 0.02, 'Indian': 0.02, 'Jewish/Kosher': 0.02, 'Sandwiches': 0.02, 'Korean': 0.015,
+    'Thai': 0.015, 'Asian/Asian Fusion': 0.015, 'Mediterranean': 0.015, 'Hamburgers': 0.015, 'Juice, Smoothies, Fruit Salads': 0.01,
+}
+LONG_TAIL_CUISINES = ['French', 'Greek', 'Middle Eastern', 'Seafood', 'Vegan', 'Vietnamese/Cambodian/Malaysia', 'Irish',
+                      'Bagels/Pretzels', 'Frozen Desserts', 'Steakhouse', 'Salads', 'Tex-Mex', 'Peruvian', 'African',
+                      'Russian', 'Turkish', 'Pakistani', 'Bangladeshi', 'Filipino', 'Soul Food', 'Hotdogs', 'Eastern European',
+                      'Polish', 'German', 'Brazilian', 'Ethiopian', 'Australian', 'Hawaiian', 'Creole/Cajun', 'Other']
+CHAINS = { #Chain name -> (share of restaurants, cuisine)
+    "DUNKIN'": (0.020, 'Donuts'), 'STARBUCKS': (0.012, 'Coffee/Tea'), "MCDONALD'S": (0.008, 'Hamburgers'),
+    'SUBWAY': (0.010, 'Sandwiches'), 'BURGER KING': (0.004, 'Hamburgers'), "DOMINO'S": (0.005, 'Pizza'),
+    'KENNEDY FRIED CHICKEN': (0.004, 'Chicken'), "POPEYES": (0.004, 'Chicken'), 'CHIPOTLE MEXICAN GRILL': (0.003, 'Mexican'),
+    'CROWN FRIED CHICKEN': (0.003, 'Chicken'), 'PAPA JOHNS': (0.002, 'Pizza'), "WENDY'S": (0.002, 'Hamburgers'),
+    'TACO BELL': (0.002, 'Tex-Mex'), 'PRET A MANGER': (0.001, 'Sandwiches'), 'SWEETGREEN': (0.001, 'Salads'),
+}
+NAME_FIRST = ['GOLDEN', 'NEW', 'LITTLE', 'BIG', 'HAPPY', 'LUCKY', 'ROYAL', 'GREEN', 'EAST', 'WEST', 'SUNNY', 'BROOKLYN',
+              'HARLEM', 'ASTORIA', 'VILLAGE', 'CORNER', 'FAMILY', 'JOE\'S', 'MAMA\'S', 'TONY\'S', 'LA', 'EL', 'CAFE', 'THE']
+NAME_SECOND = ['DRAGON', 'GARDEN', 'PALACE', 'KITCHEN', 'HOUSE', 'STAR', 'SPOON', 'BISTRO', 'GRILL', 'TAQUERIA', 'PIZZA',
+               'BAKERY', 'DELI', 'DINER', 'NOODLE', 'SUSHI', 'BAGEL', 'FORK', 'OVEN', 'TABLE', 'BREW', 'CANTINA', 'WOK', 'CREPE']
+NAME_THIRD = ['', '', '', ' CAFE', ' RESTAURANT', ' BAR', ' EXPRESS', ' & GRILL', ' II', ' NYC', ' SHOP', ' KITCHEN']
+OWNERS = ['MARIO', 'ROSA', 'AHMED', 'LI', 'KIM', 'PATEL', 'GARCIA', 'NGUYEN', 'COHEN', 'MURPHY', 'SINGH', 'LOPEZ', 'CHEN',
+          'WONG', 'SANTOS', 'IVANOV', 'MORALES', 'KHAN', 'PARK', 'RUSSO', 'AMIR', 'DIAZ', 'YILMAZ', 'OKAFOR', 'SATO',
+          'BRUNO', 'ELENA', 'HASSAN', 'JOSE', 'NINA', 'OMAR', 'PABLO', 'SOFIA', 'VICTOR', 'ZHANG', 'GRACE', 'DIMITRI']
+STREETS = ['BROADWAY', '5 AVENUE', 'AMSTERDAM AVENUE', 'FLATBUSH AVENUE', 'ROOSEVELT AVENUE', 'JAMAICA AVENUE', 'MAIN STREET',
+           'ATLANTIC AVENUE', 'GRAND CONCOURSE', 'QUEENS BOULEVARD', 'LEXINGTON AVENUE', 'BEDFORD AVENUE', 'NOSTRAND AVENUE',
+           'VICTORY BOULEVARD', 'FORDHAM ROAD', 'CHURCH AVENUE', '86 STREET', 'STEINWAY STREET', 'BRUCKNER BOULEVARD', 'CANAL STREET']
+VIOLATIONS = [ #(code, description, critical flag, relative frequency)
+    ('10F', "Non-food contact surface or equipment made of unacceptable material, not kept clean, or not properly sealed, raised, spaced or movable to allow accessibility for cleaning on all sides, above and underneath the unit.", 'Not Critical', 14),
+    ('08A', "Establishment is not free of harborage or conditions conducive to rodents, insects or other pests.", 'Not Critical', 10),
+    ('06D', "Food contact surface not properly washed, rinsed and sanitized after each use and following any activity when contamination may have occurred.", 'Critical', 7),
+    ('10B', "Anti-siphonage or back-flow prevention device not provided where required; equipment or floor not properly drained; sewage disposal system in disrepair or not functioning properly. Condensation or liquid waste improperly disposed of.", 'Not Critical', 7),
+    ('02G', "Cold TCS food item held above 41 °F; smoked or processed fish held above 38 °F; intact raw eggs held above 45 °F; or reduced oxygen packaged (ROP) TCS foods held above required temperatures except during active necessary preparation.", 'Critical', 6),
+    ('04L', "Evidence of mice or live mice in establishment's food or non-food areas.", 'Critical', 5),
+    ('06C', "Food, supplies, or equipment not protected from potential source of contamination during storage, preparation, transportation, display, service or from customer's refillable, reusable container. Condiments not in single-service containers or dispensed directly by the vendor.", 'Critical', 5),
+    ('04N', "Filth flies or food/refuse/sewage associated with (FRSA) flies or other nuisance pests in establishment's food and/or non-food areas. FRSA flies include house flies, blow flies, bottle flies, flesh flies, drain flies, Phorid flies and fruit flies.", 'Critical', 4),
+    ('02B', "Hot TCS food item not held at or above 140 °F.", 'Critical', 4),
+    ('09C', "Food contact surface not properly maintained.", 'Not Critical', 4),
+    ('10H', "Proper sanitization not provided for utensil ware washing operation.", 'Not Critical', 3),
+    ('04M', "Live roach in facility's food or non-food area.", 'Critical', 3),
+    ('06E', "Sanitized equipment or utensil, including in-use food dispensing utensil, improperly used or stored.", 'Critical', 3),
+    ('06F', "Wiping cloths soiled or not stored in sanitizing solution.", 'Critical', 3),
+    ('04H', "Raw, cooked or prepared food is adulterated, contaminated, cross-contaminated, or not discarded in accordance with HACCP plan.", 'Critical', 2),
+    ('05D', "No hand washing facility in or adjacent to toilet room or within 25 feet of a food preparation, food service or ware washing area. Hand washing facility not accessible, obstructed or used for non-hand washing purposes. No hot and cold running water or water at inadequate pressure. No soap or acceptable hand-drying device.", 'Critical', 2),
+    ('09B', "Thawing procedure improper.", 'Not Critical', 2),
+    ('10D', "Mechanical or natural ventilation not provided, inadequate, improperly installed, in disrepair or fails to prevent excessive build-up of grease, heat, steam condensation, vapors, odors, smoke or fumes.", 'Not Critical', 1),
+    ('04A', "Food Protection Certificate (FPC) not held by manager or supervisor of food operations.", 'Critical', 2),
+    ('02H', "After cooking or removal from hot holding, TCS food not cooled by an approved method.", 'Critical', 1),
+    ('04K', "Evidence of rats or live rats in establishment's food or non-food areas.", 'Critical', 1),
+    ('10E', "Accurate thermometer not provided or properly located in refrigerated, cold storage or hot holding equipment.", 'Not Critical', 1),
+    ('08C', "Pesticide use not in accordance with label or applicable laws. Prohibited chemical used/applied. Pesticide residue evident. Pest control device placed improperly.", 'Not Critical', 1),
+    ('06A', "Personal cleanliness is inadequate. Outer garment soiled with possible contaminant. Effective hair restraint not worn. Jewelry worn on hands or arms. Fingernail polish worn or fingernails not kept clean and trimmed.", 'Critical', 1),
+    ('15L', "Smoke-free workplace smoking policy not developed, implemented or posted.", 'Not Critical', 1),
+]
+GRADE_CUTOFFS = (13, 27) #A up to 13 points, B up to 27, C above.
+
+def weighted_choice(rng, options, weights, size):
+    weights = np.asarray(weights, dtype=float)
+    return np.asarray(options, dtype=object)[rng.choice(len(options), size=size, p=weights / weights.sum())]
+
+def make_restaurants(rng, count, first_camis): #One row per establishment with its fixed attributes.
+    chain_names = list(CHAINS)
+    chain_share = sum(share for share, _ in CHAINS.values())
+    is_chain = rng.random(count) < chain_share
+    chain = weighted_choice(rng, chain_names, [CHAINS[name][0] for name in chain_names], count)
+    owner = np.where(rng.random(count) < 0.6, weighted_choice(rng, OWNERS, np.ones(len(OWNERS)), count) + "'S ", '')
+    local_names = (owner + weighted_choice(rng, NAME_FIRST, np.ones(len(NAME_FIRST)), count) + ' '
+                   + weighted_choice(rng, NAME_SECOND, np.ones(len(NAME_SECOND)), count)
+                   + weighted_choice(rng, NAME_THIRD, np.ones(len(NAME_THIRD)), count))
+    cuisine_names = list(CUISINES) + LONG_TAIL_CUISINES
+    tail_share = (1 - sum(CUISINES.values())) / len(LONG_TAIL_CUISINES)
+    cuisine = weighted_choice(rng, cuisine_names, list(CUISINES.values()) + [tail_share] * len(LONG_TAIL_CUISINES), count)
+    cuisine[is_chain] = [CHAINS[name][1] for name in chain[is_chain]]
+
+    borough_names = list(BOROUGHS)
+    boro = weighted_choice(rng, borough_names, [BOROUGHS[name][0] for name in borough_names], count)
+    zip_code = np.zeros(count, dtype=np.int64)
+    latitude = np.zeros(count)
+    longitude = np.zeros(count)
+    bbl_digit = np.zeros(count, dtype=np.int64)
+    for name, (_, zips, (south, west, north, east), digit) in BOROUGHS.items():
+        members = np.flatnonzero(boro == name)
+        zip_code[members] = rng.choice(zips, size=len(members))
+        #Restaurants of one ZIP code cluster around a fixed point of the borough.
+        centres = np.column_stack([south + (zip_code[members] * 7919 % 997) / 997 * (north - south),
+                                   west + (zip_code[members] * 104729 % 991) / 991 * (east - west)])
+        latitude[members] = centres[:, 0] + rng.normal(0, 0.004, len(members))
+        longitude[members] = centres[:, 1] + rng.normal(0, 0.005, len(members))
+        bbl_digit[members] = digit
+    missing_location = rng.random(count) < 0.01 #The export writes 0 for establishments that were never geocoded.
+    latitude[missing_location] = 0
+    longitude[missing_location] = 0
+
+    return pd.DataFrame({
+        'CAMIS': first_camis + np.arange(count) * 7 + rng.integers(0, 7, count),
+        'DBA': np.where(is_chain, chain, local_names),
+        'BORO': boro,
+        'BUILDING': rng.integers(1, 3000, count).astype(str),
+        'STREET': weighted_choice(rng, STREETS, np.ones(len(STREETS)), count),
+        'ZIPCODE': zip_code,
+        'PHONE': rng.integers(2120000000, 9179999999, count).astype(str),
+        'CUISINE DESCRIPTION': cuisine,
+        'Latitude': latitude.round(6),
+        'Longitude': longitude.round(6),
+        'Community Board': bbl_digit * 100 + rng.integers(1, 15, count),
+        'Council District': rng.integers(1, 52, count),
+        'Census Tract': rng.integers(100, 160000, count),
+        'BIN': bbl_digit * 1000000 + rng.integers(0, 999999, count),
+        'BBL': bbl_digit * 1000000000 + rng.integers(0, 999999999, count),
+        'NTA': np.char.add(np.array(['MN', 'BX', 'BK', 'QN', 'SI'])[bbl_digit - 1], rng.integers(1, 99, count).astype(str)),
+    })
+
+def make_rows(rng, restaurants): #Inspections of every restaurant and one row per violation (or one row for a clean inspection).
+    days = (RECORD_DATE - FIRST_DATE).days
+    inspections_per_restaurant = 1 + rng.poisson(2.85, len(restaurants)) #With ~2.5 rows per inspection this gives ROWS_PER_SCALE rows per scale.
+    restaurant_of_inspection = np.repeat(np.arange(len(restaurants)), inspections_per_restaurant)
+    inspection_count = len(restaurant_of_inspection)
+    dates = FIRST_DATE + pd.to_timedelta(rng.integers(0, days, inspection_count), unit='D')
+    inspection_type = weighted_choice(rng, ['Cycle Inspection / Initial Inspection', 'Cycle Inspection / Re-inspection',
+                                            'Pre-permit (Operational) / Initial Inspection', 'Pre-permit (Operational) / Re-inspection',
+                                            'Administrative Miscellaneous / Initial Inspection'], [0.45, 0.25, 0.12, 0.08, 0.10], inspection_count)
+
+    violation_count = rng.poisson(2.4, inspection_count)
+    rows_per_inspection = np.maximum(violation_count, 1)
+    inspection_of_row = np.repeat(np.arange(inspection_count), rows_per_inspection)
+    has_violation = violation_count[inspection_of_row] > 0
+    violation = rng.choice(len(VIOLATIONS), size=len(inspection_of_row), p=np.array([v[3] for v in VIOLATIONS]) / sum(v[3] for v in VIOLATIONS))
+    codes = np.array([v[0] for v in VIOLATIONS], dtype=object)[violation]
+    descriptions = np.array([v[1] for v in VIOLATIONS], dtype=object)[violation]
+    flags = np.array([v[2] for v in VIOLATIONS], dtype=object)[violation]
+    codes[~has_violation], descriptions[~has_violation], flags[~has_violation] = None, None, 'Not Applicable'
+
+    #Score: points per violation summed per inspection, critical violations weigh more.
+    points = np.where(flags == 'Critical', rng.integers(5, 11, len(flags)), rng.integers(2, 6, len(flags))) * has_violation
+    score = np.bincount(inspection_of_row, weights=points, minlength=inspection_count)
+    score_missing = rng.random(inspection_count) < 0.03
+
+    #Grade rules: initial inspections are only graded A, re-inspections always get a grade, the rest is rarely graded.
+    graded = np.where(score <= GRADE_CUTOFFS[0], 'A', np.where(score <= GRADE_CUTOFFS[1], 'B', 'C')).astype(object)
+    initial = np.char.endswith(inspection_type.astype(str), 'Initial Inspection')
+    reinspection = np.char.endswith(inspection_type.astype(str), 'Re-inspection')
+    grade = np.where(reinspection | (initial & (graded == 'A')), graded, None)
+    grade[pd.isna(grade) & (rng.random(inspection_count) < 0.05)] = 'N' #Not Yet Graded
+    grade[pd.isna(grade) & (rng.random(inspection_count) < 0.03)] = 'Z' #Grade Pending
+    grade[score_missing] = None
+    administrative = inspection_type == 'Administrative Miscellaneous / Initial Inspection'
+    grade[administrative] = None
+
+    restaurant_of_row = restaurant_of_inspection[inspection_of_row]
+    rows = restaurants.iloc[restaurant_of_row].reset_index(drop=True)
+    row_dates = dates[inspection_of_row]
+    row_grades = grade[inspection_of_row]
+    rows['INSPECTION DATE'] = row_dates.strftime('%m/%d/%Y')
+    rows['ACTION'] = np.where(has_violation, 'Violations were cited in the following area(s).', 'No violations were recorded at the time of this inspection.')
+    rows['VIOLATION CODE'] = codes
+    rows['VIOLATION DESCRIPTION'] = descriptions
+    rows['CRITICAL FLAG'] = flags
+    rows['SCORE'] = np.where(score_missing[inspection_of_row] | administrative[inspection_of_row], np.nan, score[inspection_of_row])
+    rows['GRADE'] = row_grades
+    rows['GRADE DATE'] = np.where(pd.notna(row_grades), rows['INSPECTION DATE'], None)
+    rows['RECORD DATE'] = RECORD_DATE.strftime('%m/%d/%Y')
+    rows['INSPECTION TYPE'] = inspection_type[inspection_of_row]
+    rows['Location'] = np.where(rows['Latitude'] != 0, 'POINT (' + rows['Longitude'].astype(str) + ' ' + rows['Latitude'].astype(str) + ')', None)
+    return rows[RAW_COLUMNS]
+
+def generate(path, scale=1, seed=0): #Writes the synthetic CSV and returns (rows, restaurants, seconds).
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    total_restaurants = max(int(RESTAURANTS_PER_SCALE * scale), 1)
+    rows_written = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for first in range(0, total_restaurants, RESTAURANTS_PER_CHUNK):
+            count = min(RESTAURANTS_PER_CHUNK, total_restaurants - first)
+            restaurants = make_restaurants(rng, count, 30000000 + first * 7)
+            rows = make_rows(rng, restaurants)
+            rows.to_csv(f, header=first == 0, index=False)
+            rows_written += len(rows)
+    return rows_written, total_restaurants, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic NYC restaurant inspection CSV.")
+    parser.add_argument("--scale", type=float, default=1, help=f"1 is about {ROWS_PER_SCALE} rows, like the live dataset.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+    rows, restaurants, seconds = generate(args.out, args.scale, args.seed)
+    print(f"Wrote {rows} rows for {restaurants} restaurants to {args.out} in {seconds:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#Regression checks: the indexes, backends and cube must answer exactly like the original pandas expressions of app_v3.
+#Runs on a small synthetic dataset (synthetic_data.py), fully offline. pip install -r requirements-dev.txt, then: python -m pytest -q test_regression.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import compact
+import cube
+import data_store
+import ingest
+import refresh
+import shared_dataset
+import synthetic_data
+from dataset import Dataset
+from query_backend import DuckDBBackend, PandasBackend
+
+SCALE = 0.05 #About 14k raw rows.
+
+@pytest.fixture(scope="module")
+def raw_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp("raw") / "synthetic.csv"
+    synthetic_data.generate(path, SCALE, seed=0)
+    return path
+
+def build_base_and_delta(raw_csv, folder): #Snapshot of the older 80% of the rows plus a delta file that overlaps it and changes one stored row.
+    raw = pd.read_csv(raw_csv) #Types guessed, like any delta file on disk.
+    dates = pd.to_datetime(raw['INSPECTION DATE'], format=ingest.DATE_FORMAT)
+    raw[dates < dates.quantile(0.8)].to_csv(folder / "base.csv", index=False)
+    snapshot_dir = str(folder / "snapshot")
+    data_store.build_snapshot(folder / "base.csv", snapshot_dir)
+
+    watermark = pd.Timestamp(data_store.read_manifest(snapshot_dir)["watermark"])
+    delta = raw[dates >= watermark - pd.Timedelta(days=7)].copy() #Overlaps the stored rows, which must not be stored again.
+    delta.loc[(dates == watermark)[delta.index].idxmax(), 'SCORE'] = 99 #A changed row on the re-read day must replace the stored one.
+    delta.to_parquet(folder / "delta.parquet")
+    return snapshot_dir, str(folder / "delta.parquet")
+
+@pytest.fixture(scope="module", params=["single segment", "after refresh"])
+def snapshot_dir(request, raw_csv, tmp_path_factory): #"after refresh" has a base and a delta segment, merged by ROW_KEY.
+    folder = tmp_path_factory.mktemp("snapshot")
+    if request.param == "single segment":
+        data_store.build_snapshot(raw_csv, str(folder))
+        return str(folder)
+    snapshot_dir, delta_path = build_base_and_delta(raw_csv, folder)
+    refresh.refresh(delta_path, snapshot_dir, offline=True)
+    assert len(data_store.read_manifest(snapshot_dir)["files"]) == 2
+    return snapshot_dir
+
+@pytest.fixture(scope="module")
+def dataset(snapshot_dir):
+    version = data_store.dataset_version(snapshot_dir)
+    dataset = Dataset(data_store.load_snapshot(snapshot_dir), version)
+    dataset.cube = cube.load_cube(version, snapshot_dir) #Saved by build_snapshot, never built by the app.
+    return dataset
+
+@pytest.fixture(scope="module")
+def original(dataset): #The frame in the object / float64 layout the original expressions ran on.
+    return compact.decode_frame(dataset.df)
+
+@pytest.fixture(params=["pandas", "duckdb"])
+def backend(request, dataset, snapshot_dir):
+    if request.param == "pandas":
+        return PandasBackend(dataset)
+    pytest.importorskip("duckdb")
+    return DuckDBBackend(snapshot_dir) #Reads the snapshot files itself, through the multi-segment merge view after a refresh.
+
+def row_set(frame): #Rows as sorted, comparable strings; the backends return different indexes and dtypes.
+    frame = frame[ingest.COLUMNS].astype({'CAMIS': 'int64', 'SCORE': 'float64', 'ZIPCODE': 'float64'}).astype(object)
+    return sorted(repr(row) for row in frame.where(frame.notna(), None).itertuples(index=False, name=None))
+
+def search_cases(df):
+    names = compact.code_counts(df['DBA']).index
+    zip_code = int(df['ZIPCODE'].dropna().mode()[0])
+    return [(names[0], None), ("pizza", None), (names[len(names) // 2].lower()[1:6], None), (None, zip_code), ("a", zip_code)]
+
+def test_search_matches_str_contains(dataset, original, backend):
+    for name, zip_code in search_cases(dataset.df):
+        expected = original
+        if name:
+            expected = expected[expected['DBA'].str.contains(name, case=False, regex=False, na=False)]
+        if zip_code:
+            expected = expected[expected['ZIPCODE'] == zip_code]
+        expected = expected.sort_values(by='INSPECTION DATE', ascending=False)
+        assert len(expected) > 0
+        assert row_set(backend.search(name, zip_code, limit=None)) == row_set(expected)
+        top = backend.search(name, zip_code, limit=20)
+        assert list(top['INSPECTION DATE']) == list(expected['INSPECTION DATE'].head(20)) #Ties may be broken differently, the dates may not.
+
+@pytest.mark.parametrize("critical", ["All", "Critical", "Not Critical"])
+def test_top_by_score_matches_sort(dataset, original, backend, critical):
+    cuisine = compact.code_counts(dataset.df['CUISINE DESCRIPTION']).index[0]
+    for selected_cuisine, grade in [(cuisine, 'A'), (None, 'B'), (cuisine, None), (None, None)]:
+        expected = original
+        if selected_cuisine:
+            expected = expected[expected['CUISINE DESCRIPTION'] == selected_cuisine]
+        if grade:
+            expected = expected[expected['GRADE'] == grade]
+        if critical != "All":
+            expected = expected[expected['CRITICAL FLAG'] == critical]
+        expected = expected.sort_values(by='SCORE')
+        assert row_set(backend.top_by_score(selected_cuisine, grade, critical, limit=None)) == row_set(expected)
+        top = backend.top_by_score(selected_cuisine, grade, critical, limit=20)
+        np.testing.assert_array_equal(top['SCORE'].to_numpy(dtype='float64', na_value=np.nan), expected['SCORE'].head(20).to_numpy())
+
+@pytest.mark.parametrize("column", ['CUISINE DESCRIPTION', 'BORO', 'GRADE', 'DBA'])
+def test_counts_match_value_counts(original, backend, column):
+    counts = backend.counts(column)
+    assert dict(zip(counts[column], counts['rows'])) == original[column].value_counts().to_dict()
+    assert list(backend.counts(column, limit=15)['rows']) == list(original[column].value_counts().head(15))
+
+def test_duckdb_threads_get_the_same_answers(snapshot_dir):
+    pytest.importorskip("duckdb")
+    backend = DuckDBBackend(snapshot_dir)
+    query = lambda _: row_set(backend.top_by_score(None, 'A', "Critical", limit=50)) #Every thread opens its own cursor.
+    with ThreadPoolExecutor(8) as pool:
+        answers = list(pool.map(query, range(32)))
+    assert all(answer == answers[0] for answer in answers)
+
+def test_history_rolling_matches_groupby(dataset):
+    inspections = dataset.model.inspections
+    expected = inspections['SCORE'].astype('float64').groupby(inspections['restaurant_id']).transform(
+        lambda scores: scores.rolling(3, min_periods=1).mean())
+    np.testing.assert_allclose(dataset.history.rolling, expected.to_numpy(), equal_nan=True)
+
+def test_refresh_cube_matches_full_rebuild(raw_csv, tmp_path):
+    snapshot_dir, delta_path = build_base_and_delta(raw_csv, tmp_path)
+    version, _ = refresh.refresh(delta_path, snapshot_dir, offline=True)
+    assert version == 2
+    rows = data_store.read_manifest(snapshot_dir)["rows"]
+    assert refresh.refresh(delta_path, snapshot_dir, offline=True)[0] == version #Nothing new the second time.
+    assert data_store.read_manifest(snapshot_dir)["rows"] == rows
+
+    refreshed = cube.load_cube(version, snapshot_dir)
+    rebuilt = cube.build_cube(data_store.load_snapshot(snapshot_dir))
+    pd.testing.assert_frame_equal(refreshed.sort_values(cube.DIMENSIONS).reset_index(drop=True),
+                                  rebuilt.sort_values(cube.DIMENSIONS).reset_index(drop=True), check_dtype=False)
+
+def test_shared_indexes_match_local(dataset, tmp_path):
+    shared_dataset.publish(dataset.df, dataset.version, str(tmp_path))
+    shared = Dataset(shared_dataset.attach(shared_dir=str(tmp_path)), dataset.version, shared_dataset.attach_indexes(shared_dir=str(tmp_path)))
+    assert set(shared.shared) == set(shared_dataset.INDEXES)
+    np.testing.assert_array_equal(shared.name_index.search("pizza", limit=50), dataset.name_index.search("pizza", limit=50))
+    np.testing.assert_array_equal(shared.facet_index.top_k(None, 'A', "Critical", k=None), dataset.facet_index.top_k(None, 'A', "Critical", k=None))
+    pd.testing.assert_frame_equal(shared.model.current('A'), dataset.model.current('A'))
+    quarter = dataset.history.quarters[0]
+    pd.testing.assert_frame_equal(shared.history.worsening(quarter), dataset.history.worsening(quarter))
+    zip_code = int(dataset.df['ZIPCODE'].dropna().iloc[0])
+    np.testing.assert_array_equal(shared.spatial_index.zip_rows(zip_code), dataset.spatial_index.zip_rows(zip_code))
+    bitmap = dataset.violation_index.search("food", start=dataset.violation_index.latest_date - np.timedelta64(180, 'D'))
+    np.testing.assert_array_equal(shared.violation_index.rows_of(bitmap), dataset.violation_index.rows_of(bitmap))
@@ -0,0 +1,129 @@
+#Keyword search over VIOLATION DESCRIPTION, combined with borough, cuisine, grade, critical flag and date filters.
+#The column holds a few hundred distinct descriptions repeated on every row, so the words are indexed once per distinct
+#description. Each row has exactly one description, so a boolean keyword query ("mice OR roaches", "food NOT cold") is
+#evaluated over those few hundred descriptions first and then turned into a row bitmap with one lookup per row code.
+#Row bitmaps are packed 1 bit per row (np.packbits); filters are ANDed together as bitmaps, and the bitmap of every
+#category value is built once and cached. Row ids are positions in the frame the index was built from (use df.iloc).
+
+import bisect
+import re
+
+import numpy as np
+
+WORD = re.compile(r"[a-z0-9]+")
+FILTER_COLUMNS = ['BORO', 'CUISINE DESCRIPTION', 'GRADE', 'CRITICAL FLAG']
+POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.int64) #Set bits per byte value.
+
+def words(text):
+    return WORD.findall(str(text).lower())
+
+def parse_query(query): #'mice or roaches not live' -> [[('mice', False)], [('roaches', False), ('live', True)]], groups ORed, terms ANDed.
+    groups = []
+    for group in re.split(r"\s+or\s+", query.strip().lower()):
+        terms, negate = [], False
+        for word in group.split():
+            if word == "not" or word == "-":
+                negate = True
+                continue
+            if word.startswith("-"): #'-roaches' is the same as 'not roaches'.
+                word, negate = word[1:], True
+            if word != "and":
+                terms.extend((term, negate) for term in words(word))
+            negate = False
+        if terms:
+            groups.append(terms)
+    return groups
+
+class ViolationIndex:
+    SHARED = ('date_order',) #Per-row array that shared_dataset.publish() writes once for every process on the host.
+
+    def __init__(self, df, shared=None):
+        self.rows = len(df)
+        self.descriptions = df['VIOLATION DESCRIPTION'].cat.categories
+        self.description_code = df['VIOLATION DESCRIPTION'].cat.codes.to_numpy()
+
+        #Sorted vocabulary and, for every word, the descriptions that contain it.
+        postings = {}
+        for code, description in enumerate(self.descriptions):
+            for word in set(words(description)):
+                postings.setdefault(word, []).append(code)
+        self.vocabulary = sorted(postings)
+        self.postings = [np.array(postings[word], dtype=np.int64) for word in self.vocabulary]
+
+        self.codes = {column: df[column].cat.codes.to_numpy() for column in FILTER_COLUMNS}
+        self.categories = {column: df[column].cat.categories for column in FILTER_COLUMNS}
+        self.value_bitmaps = {} #(column, value) -> packed bitmap, filled on first use.
+
+        self.dates = df['INSPECTION DATE'].to_numpy()
+        if shared: #Mapped read-only from the shared dataset instead of being sorted again.
+            self.date_order = shared['date_order']
+        else:
+            self.date_order = np.argsort(self.dates, kind='stable').astype(np.int32) #Rows by date, so a date range is one slice.
+        self.latest_date = self.dates[self.date_order[-1]] if self.rows else None
+
+    def term_descriptions(self, term): #Descriptions with a word starting with term ('roach' matches 'roaches').
+        start = bisect.bisect_left(self.vocabulary, term)
+        end = bisect.bisect_left(self.vocabulary, term + '\uffff')
+        matched = np.zeros(len(self.descriptions), dtype=bool)
+        for position in range(start, end):
+            matched[self.postings[position]] = True
+        return matched
+
+    def matching_descriptions(self, query): #Boolean mask over the distinct descriptions, None for an empty query.
+        groups = parse_query(query)
+        if not groups:
+            return None
+        matched = np.zeros(len(self.descriptions), dtype=bool)
+        for terms in groups:
+            group = np.ones(len(self.descriptions), dtype=bool)
+            for term, negate in terms:
+                group &= ~self.term_descriptions(term) if negate else self.term_descriptions(term)
+            matched |= group
+        return matched
+
+    def bitmap_of_codes(self, codes, selected): #Packed bitmap of the rows whose code is selected; code -1 (missing) never matches.
+        lookup = np.append(selected, False) #Index -1 reads the trailing False.
+        return np.packbits(lookup[codes])
+
+    def keyword_bitmap(self, query):
+        matched = self.matching_descriptions(query)
+        if matched is None:
+            return self.all_rows()
+        return self.bitmap_of_codes(self.description_code, matched)
+
+    def value_bitmap(self, column, value): #Rows where column == value, cached per value.
+        key = (column, value)
+        if key not in self.value_bitmaps:
+            selected = np.asarray(self.categories[column] == value)
+            self.value_bitmaps[key] = self.bitmap_of_codes(self.codes[column], selected)
+        return self.value_bitmaps[key]
+
+    def date_bitmap(self, start=None, end=None): #Rows inspected between start and end (inclusive, either may be None).
+        low = 0 if start is None else np.searchsorted(self.dates, np.datetime64(start), side='left', sorter=self.date_order)
+        high = self.rows if end is None else np.searchsorted(self.dates, np.datetime64(end), side='right', sorter=self.date_order)
+        selected = np.zeros(self.rows, dtype=bool)
+        selected[self.date_order[low:high]] = True
+        return np.packbits(selected)
+
+    def all_rows(self):
+        return np.packbits(np.ones(self.rows, dtype=bool))
+
+    def search(self, query, boro=None, cuisine=None, grade=None, critical=None, start=None, end=None): #Packed bitmap of the rows matching every given filter.
+        bitmap = self.keyword_bitmap(query)
+        for column, value in (('BORO', boro), ('CUISINE DESCRIPTION', cuisine), ('GRADE', grade), ('CRITICAL FLAG', critical)):
+            if value and value != "All":
+                bitmap = bitmap & self.value_bitmap(column, value)
+        if start is not None or end is not None:
+            bitmap = bitmap & self.date_bitmap(start, end)
+        return bitmap
+
+    def count(self, bitmap):
+        return int(POPCOUNT[bitmap].sum())
+
+    def rows_of(self, bitmap, limit=None): #Row ids in the bitmap, most recent inspection first.
+        rows = np.flatnonzero(np.unpackbits(bitmap, count=self.rows))
+        dates = self.dates[rows]
+        if limit is not None and len(rows) > limit:
+            keep = np.argpartition(-dates.astype(np.int64), limit)[:limit]
+            rows, dates = rows[keep], dates[keep]
+        return rows[np.argsort(-dates.astype(np.int64), kind='stable')]